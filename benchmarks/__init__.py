@@ -0,0 +1,6 @@
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+# 
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+
+# Designate as module
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+Benchmarks :func:`gammatone.fftweight.fft_gtgram` with dense weights against
+banded weights (the ``weight_threshold`` argument) for a large filterbank and
+FFT, and reports the largest difference relative to the largest value of the
+dense result.
+
+Run from the top level directory with::
+
+    python -m benchmarks.banded_weights
+"""
+from __future__ import division
+
+import numpy as np
+
+import gammatone.fftweight
+from benchmarks.segmented import best_time
+
+FS = 44100
+DURATION = 10
+# A 0.1s window gives nfft = 8192
+PARAMS = (0.1, 0.01, 1024, 20)
+THRESHOLDS = (1e-2, 1e-3, 1e-4)
+
+
+def main():
+    wave = np.random.RandomState(0).randn(FS * DURATION)
+
+    print(
+        "{:d} s at {:d} Hz, (window, hop, channels, f_min) = {}".format(
+            DURATION, FS, PARAMS
+    ))
+    print(
+        "{:>10s} {:>10s} {:>8s} {:>10s}".format(
+            "threshold", "time (s)", "speedup", "error"
+    ))
+
+    expected = gammatone.fftweight.fft_gtgram(wave, FS, *PARAMS)
+    dense_time = best_time(
+        lambda: gammatone.fftweight.fft_gtgram(wave, FS, *PARAMS)
+    )
+    print("{:>10s} {:>10.3f}".format("dense", dense_time))
+
+    for threshold in THRESHOLDS:
+        result = gammatone.fftweight.fft_gtgram(
+            wave, FS, *PARAMS, weight_threshold=threshold
+        )
+        banded_time = best_time(
+            lambda: gammatone.fftweight.fft_gtgram(
+                wave, FS, *PARAMS, weight_threshold=threshold
+            )
+        )
+
+        print(
+            "{:>10g} {:>10.3f} {:>8.2f} {:>10.2e}".format(
+                threshold, banded_time, dense_time / banded_time,
+                np.abs(result - expected).max() / expected.max()
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+Benchmarks the ``'iir'`` and ``'fir'`` engines of
+:func:`gammatone.filters.erb_filterbank` over a range of channel counts and
+lowest centre frequencies, to show where the FFT convolution engine becomes
+faster. The lowest centre frequency sets the length of the longest impulse
+response, and so the FFT size.
+
+Run from the top level directory with::
+
+    python -m benchmarks.fir_engine
+"""
+from __future__ import division
+
+import numpy as np
+
+import gammatone.filters
+from benchmarks.segmented import best_time
+
+FS = 44100
+DURATION = 2
+CHANNEL_COUNTS = (16, 64, 256, 1024)
+LOW_FREQS = (20, 200, 1000)
+
+
+def main():
+    wave = np.random.RandomState(0).randn(FS * DURATION)
+
+    print(
+        "{:d} s at {:d} Hz, fir_tolerance {:g}".format(
+            DURATION, FS, gammatone.filters.DEFAULT_FIR_TOLERANCE
+    ))
+    print(
+        "{:>8s} {:>6s} {:>8s} {:>9s} {:>9s} {:>7s} {:>9s}".format(
+            "channels", "f_min", "fir len", "iir (s)", "fir (s)", "ratio",
+            "max err"
+    ))
+
+    for f_min in LOW_FREQS:
+        for channels in CHANNEL_COUNTS:
+            cfs = gammatone.filters.centre_freqs(FS, channels, f_min)
+            coefs = gammatone.filters.make_erb_filters(FS, cfs)
+
+            # Check the error on a short excerpt, to save memory
+            excerpt = wave[:FS // 2]
+            iir = gammatone.filters.erb_filterbank(excerpt, coefs)
+            fir = gammatone.filters.erb_filterbank(
+                excerpt, coefs, engine='fir'
+            )
+            error = np.max(
+                np.abs(fir - iir).max(axis=-1) / np.abs(iir).max(axis=-1)
+            )
+            del iir, fir
+
+            iir_time = best_time(
+                lambda: gammatone.filters.erb_filterbank(wave, coefs),
+                repeats=1
+            )
+            fir_time = best_time(
+                lambda: gammatone.filters.erb_filterbank(
+                    wave, coefs, engine='fir'
+                ),
+                repeats=1
+            )
+            length = gammatone.filters.erb_impulse_responses(coefs).shape[1]
+
+            print(
+                "{:>8d} {:>6g} {:>8d} {:>9.3f} {:>9.3f} {:>7.2f} {:>9.1e}"
+                .format(
+                    channels, f_min, length, iir_time, fir_time,
+                    iir_time / fir_time, error
+            ))
+
+
+if __name__ == '__main__':
+    main()
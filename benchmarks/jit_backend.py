@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+Benchmarks the ``'scipy'`` and ``'numba'`` backends of
+:func:`gammatone.filters.erb_filterbank`, in input samples per second, over a
+range of channel counts. Requires numba.
+
+Run from the top level directory with::
+
+    python -m benchmarks.jit_backend
+"""
+from __future__ import division
+
+import numpy as np
+
+import gammatone.filters
+from benchmarks.segmented import best_time
+
+FS = 44100
+DURATION = 2
+F_MIN = 20
+CHANNEL_COUNTS = (64, 256, 1024)
+WORKERS = -1
+
+
+def main():
+    wave = np.random.RandomState(0).randn(FS * DURATION)
+    samples = wave.shape[-1]
+
+    print("{:d} s at {:d} Hz, workers = {:d}".format(DURATION, FS, WORKERS))
+    print(
+        "{:>8s} {:>14s} {:>14s} {:>8s}".format(
+            "channels", "scipy (smp/s)", "numba (smp/s)", "speedup"
+    ))
+
+    # Compile outside the timing
+    gammatone.filters.erb_filterbank(
+        wave[:100],
+        gammatone.filters.make_erb_filters(
+            FS, gammatone.filters.centre_freqs(FS, 2, F_MIN)
+        ),
+        backend='numba'
+    )
+
+    for channels in CHANNEL_COUNTS:
+        cfs = gammatone.filters.centre_freqs(FS, channels, F_MIN)
+        coefs = gammatone.filters.make_erb_filters(FS, cfs)
+
+        times = [
+            best_time(
+                lambda: gammatone.filters.erb_filterbank(
+                    wave, coefs, workers=WORKERS, backend=backend
+                ),
+                repeats=2
+            )
+            for backend in gammatone.filters.BACKENDS
+        ]
+
+        print(
+            "{:>8d} {:>14.3g} {:>14.3g} {:>8.2f}".format(
+                channels, samples / times[0], samples / times[1],
+                times[0] / times[1]
+        ))
+
+
+if __name__ == '__main__':
+    main()
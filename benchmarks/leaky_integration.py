@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+Benchmarks the leaky integrator energy integration of
+:func:`gammatone.gtgram.gtgram` (:func:`gammatone.gtgram.integrate_leaky`)
+against the rectangular window integration
+(:func:`gammatone.gtgram.integrate_windows`), for a range of window lengths at
+a fixed hop.
+
+Run from the top level directory with::
+
+    python -m benchmarks.leaky_integration
+"""
+from __future__ import division
+
+import numpy as np
+
+import gammatone.gtgram
+from benchmarks.segmented import best_time
+
+FS = 44100
+DURATION = 10
+CHANNELS = 64
+HOP_TIME = 0.01
+WINDOW_TIMES = (0.025, 0.05, 0.1, 0.2, 0.5)
+
+
+def main():
+    xe = np.random.RandomState(0).randn(CHANNELS, FS * DURATION) ** 2
+
+    print(
+        "{:d} channels, {:d} s at {:d} Hz, {:g} s hop".format(
+            CHANNELS, DURATION, FS, HOP_TIME
+    ))
+    print(
+        "{:>8s} {:>10s} {:>10s} {:>8s}".format(
+            "window", "window (s)", "leaky (s)", "speedup"
+    ))
+
+    for window_time in WINDOW_TIMES:
+        nwin, hop_samples, ncols = gammatone.gtgram.gtgram_strides(
+            FS, window_time, HOP_TIME, xe.shape[-1]
+        )
+        sos = gammatone.gtgram.leaky_integrator_sos(FS, window_time)
+        out = np.empty((CHANNELS, ncols))
+
+        window_time_taken = best_time(
+            lambda: gammatone.gtgram.integrate_windows(
+                xe, nwin, hop_samples, out
+            )
+        )
+        leaky_time_taken = best_time(
+            lambda: gammatone.gtgram.integrate_leaky(
+                xe, sos, nwin, hop_samples, out
+            )
+        )
+
+        print(
+            "{:>8g} {:>10.3f} {:>10.3f} {:>8.2f}".format(
+                window_time, window_time_taken, leaky_time_taken,
+                window_time_taken / leaky_time_taken
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+Benchmarks the time per call of :class:`gammatone.plan.GammatonegramPlan`
+against :func:`gammatone.gtgram.gtgram` and
+:func:`gammatone.fftweight.fft_gtgram` for short clips, where the per-call
+setup is a significant part of the total.
+
+Run from the top level directory with::
+
+    python -m benchmarks.plan
+"""
+from __future__ import division
+
+import numpy as np
+
+import gammatone.fftweight
+import gammatone.gtgram
+import gammatone.plan
+from benchmarks.segmented import best_time
+
+FS = 16000
+PARAMS = (0.025, 0.01, 32, 50)
+CLIP_TIMES = (0.1, 0.25, 1)
+CALLS = 200
+
+FUNCTIONS = {
+    'gtgram': gammatone.gtgram.gtgram,
+    'fft_gtgram': gammatone.fftweight.fft_gtgram,
+}
+
+
+def main():
+    print(
+        "{:d} Hz, (window, hop, channels, f_min) = {}, {:d} calls".format(
+            FS, PARAMS, CALLS
+    ))
+    print(
+        "{:>11s} {:>8s} {:>14s} {:>12s} {:>8s}".format(
+            "method", "clip (s)", "function (us)", "plan (us)", "speedup"
+    ))
+
+    for method in gammatone.plan.METHODS:
+        function = FUNCTIONS[method]
+        plan = gammatone.plan.GammatonegramPlan(FS, *PARAMS, method=method)
+
+        for clip_time in CLIP_TIMES:
+            clip = np.random.RandomState(0).randn(int(clip_time * FS))
+
+            function_time = best_time(
+                lambda: [function(clip, FS, *PARAMS) for _ in range(CALLS)]
+            ) / CALLS
+            plan_time = best_time(
+                lambda: [plan(clip) for _ in range(CALLS)]
+            ) / CALLS
+
+            print(
+                "{:>11s} {:>8g} {:>14.1f} {:>12.1f} {:>8.2f}".format(
+                    method, clip_time, function_time * 1e6, plan_time * 1e6,
+                    function_time / plan_time
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+Benchmarks time-segmented parallel filtering against sequential
+:func:`gammatone.filters.erb_filterbank`, for a long signal with few channels.
+
+Run from the top level directory with::
+
+    python -m benchmarks.segmented
+"""
+from __future__ import division
+import os
+import time
+
+import numpy as np
+
+import gammatone.filters
+
+FS = 16000
+DURATION = 600
+CHANNELS = 8
+F_MIN = 20
+SEGMENT_COUNTS = (1, 2, 4, 8, 16, 32)
+
+
+def best_time(function, repeats=3):
+    """ Returns the fastest of ``repeats`` calls to ``function``, in seconds """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    coefs = gammatone.filters.make_erb_filters(FS, cfs)
+    wave = np.random.RandomState(0).randn(FS * DURATION)
+    workers = os.cpu_count() or 1
+
+    print(
+        "{:d} channels, {:d} s at {:d} Hz, {:d} workers, pre-roll {:d} samples"
+        .format(
+            CHANNELS, DURATION, FS, workers,
+            int(gammatone.filters.erb_decay_length(coefs).max())
+    ))
+
+    expected = gammatone.filters.erb_filterbank(wave, coefs)
+    sequential = best_time(
+        lambda: gammatone.filters.erb_filterbank(wave, coefs)
+    )
+    print("{:>10s} {:>10.3f} s".format("sequential", sequential))
+
+    for segments in SEGMENT_COUNTS:
+        result = gammatone.filters.erb_filterbank_segmented(
+            wave, coefs, segments=segments, workers=workers
+        )
+        error = np.max(
+            np.abs(result - expected).max(axis=-1)
+            / np.abs(expected).max(axis=-1)
+        )
+        elapsed = best_time(
+            lambda: gammatone.filters.erb_filterbank_segmented(
+                wave, coefs, segments=segments, workers=workers
+            )
+        )
+        print(
+            "{:>10d} {:>10.3f} s  speedup {:5.2f}  max relative error {:.1e}"
+            .format(segments, elapsed, sequential / elapsed, error)
+        )
+
+
+if __name__ == '__main__':
+    main()
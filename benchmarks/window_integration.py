@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+Benchmarks the window energy integration step of
+:func:`gammatone.gtgram.gtgram` (:func:`gammatone.gtgram.integrate_windows`)
+against the original loop that copied out one window per column, over a range
+of window to hop ratios.
+
+Run from the top level directory with::
+
+    python -m benchmarks.window_integration
+"""
+from __future__ import division
+
+import numpy as np
+
+import gammatone.gtgram
+from benchmarks.segmented import best_time
+
+FS = 44100
+DURATION = 10
+CHANNELS = 128
+WINDOW_TIME = 0.025
+# Window length to hop length ratios, including ones where the hop doesn't
+# divide the window
+RATIOS = (1, 1.5, 2, 3, 4, 8)
+
+
+def loop_integration(xe, nwin, hop_samples, ncols):
+    """ The original per-column implementation """
+    y = np.zeros(xe.shape[:-1] + (ncols,))
+
+    for cnum in range(ncols):
+        segment = xe[..., cnum * hop_samples + np.arange(nwin)]
+        y[..., cnum] = np.sqrt(segment.mean(-1))
+
+    return y
+
+
+def main():
+    xe = np.random.RandomState(0).randn(CHANNELS, FS * DURATION) ** 2
+
+    print(
+        "{:d} channels, {:d} s at {:d} Hz, {:g} s windows".format(
+            CHANNELS, DURATION, FS, WINDOW_TIME
+    ))
+    print(
+        "{:>6s} {:>6s} {:>6s} {:>10s} {:>10s} {:>8s}".format(
+            "ratio", "nwin", "hop", "loop (s)", "view (s)", "speedup"
+    ))
+
+    for ratio in RATIOS:
+        nwin, hop_samples, ncols = gammatone.gtgram.gtgram_strides(
+            FS, WINDOW_TIME, WINDOW_TIME / ratio, xe.shape[-1]
+        )
+        out = np.empty((CHANNELS, ncols))
+
+        expected = loop_integration(xe, nwin, hop_samples, ncols)
+        gammatone.gtgram.integrate_windows(xe, nwin, hop_samples, out)
+        assert np.allclose(out, expected, rtol=1e-12)
+
+        loop_time = best_time(
+            lambda: loop_integration(xe, nwin, hop_samples, ncols)
+        )
+        view_time = best_time(
+            lambda: gammatone.gtgram.integrate_windows(
+                xe, nwin, hop_samples, out
+            )
+        )
+
+        print(
+            "{:>6g} {:>6d} {:>6d} {:>10.3f} {:>10.3f} {:>8.2f}".format(
+                ratio, nwin, hop_samples, loop_time, view_time,
+                loop_time / view_time
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -48,9 +48,10 @@ copyright = u'2014, Jason Heeris'
 # built documents.
 #
 # The short X.Y version.
-version = '1.0'
+import gammatone
+version = gammatone.__version__
 # The full version, including alpha/beta/rc tags.
-release = '1.0'
+release = gammatone.__version__
 
 # The language for content autogenerated by Sphinx. Refer to documentation
 # for a list of supported languages.
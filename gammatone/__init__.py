@@ -7,3 +7,7 @@
 """
 Gammatone filterbank toolkit
 """
+
+# The single source of the version, which is also read by setup.py and the docs.
+# Bump it in any release that changes results: the disk cache keys include it.
+__version__ = '1.1'
@@ -0,0 +1,205 @@
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+This module contains :func:`analyse_batch`, for calculating the gammatonegrams
+of a large corpus of clips (of any lengths) in a pool of worker processes. It
+doesn't import the plotting module, so workers don't load matplotlib.
+"""
+from __future__ import division
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import os
+import time
+
+import numpy as np
+import scipy.io.wavfile
+
+from .filters import _num_workers
+
+# The number of tasks queued per worker when no limit is given
+DEFAULT_PENDING_PER_WORKER = 2
+
+# The plan used by the tasks in a worker process (see _init_worker)
+_worker_plan = None
+
+
+class BatchStats:
+    """
+    Throughput of an :func:`analyse_batch` run, updated as each result is
+    returned. Times are measured from when the object is created.
+    """
+
+    def __init__(self):
+        self.clips = 0
+        self.samples = 0
+        self.audio_seconds = 0.0
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def _add(self, samples, fs):
+        self.clips += 1
+        self.samples += samples
+        self.audio_seconds += samples / fs
+        self.elapsed = time.perf_counter() - self.start
+
+    @property
+    def clips_per_second(self):
+        """ The number of clips analysed per second of wall clock time """
+        return self.clips / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def realtime_factor(self):
+        """
+        The number of seconds of audio analysed per second of wall clock time
+        """
+        return self.audio_seconds / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            "{:d} clips ({:.1f} s of audio) in {:.1f} s: {:.1f} clips/s, "
+            "{:.1f}x realtime".format(
+                self.clips, self.audio_seconds, self.elapsed,
+                self.clips_per_second, self.realtime_factor
+        ))
+
+
+def read_clip(path, fs=None):
+    """
+    Reads a clip from the WAV file at ``path``, averaging its channels as
+    :mod:`gammatone.plot` does. If ``fs`` is given, the file must have that
+    sample rate.
+    """
+    samplerate, data = scipy.io.wavfile.read(path)
+
+    if fs is not None and samplerate != fs:
+        raise ValueError(
+            "{} has a sample rate of {} Hz, not {} Hz".format(
+                path, samplerate, fs
+        ))
+
+    if data.ndim > 1:
+        data = data.mean(1)
+
+    return data
+
+
+def _init_worker(plan):
+    """ Process pool initialiser, which keeps the plan for later tasks """
+    global _worker_plan
+    _worker_plan = plan
+
+
+def _analyse_clip(item):
+    """
+    Process pool task: analyses one clip (a waveform or a file path) with the
+    worker's plan, and returns the result and the length of the clip.
+    """
+    if isinstance(item, (str, bytes, os.PathLike)):
+        item = read_clip(item, _worker_plan.fs)
+
+    wave = np.asarray(item)
+    return _worker_plan(wave), wave.shape[-1]
+
+
+def analyse_batch(
+        clips,
+        plan,
+        workers=None,
+        max_pending=None,
+        ordered=True,
+        stats=None,
+    ):
+    """
+    Calculates the gammatonegram of every clip in ``clips`` in a pool of worker
+    processes, and generates ``(index, result)`` pairs, where ``index`` is the
+    position of the clip in ``clips``.
+
+    :param clips: an iterable of waveforms (one dimensional arrays), or of
+      paths to WAV files at the plan's sample rate (see :func:`read_clip`).
+      Clips can have different lengths, and are only taken from the iterable as
+      workers become free, so it can be a lazy sequence over a large corpus.
+    :param plan: a :class:`gammatone.plan.GammatonegramPlan` with the analysis
+      parameters. It is sent to each worker once when the pool starts, so the
+      coefficients are only designed once per worker.
+    :param workers: the number of processes, or ``-1`` (the default) for one
+      per CPU
+    :param max_pending: the largest number of clips that have been submitted
+      but not yet returned, which bounds the memory used by queued waveforms
+      and finished results (default is twice the number of workers)
+    :param ordered: if true, results are returned in the order of ``clips``;
+      otherwise they are returned as soon as they are finished
+    :param stats: a :class:`BatchStats` that is updated as results are
+      returned, for reporting throughput
+
+    For example::
+
+        plan = GammatonegramPlan(16000, 0.025, 0.01, 64, 50, 'fft_gtgram')
+        stats = BatchStats()
+        for index, result in analyse_batch(paths, plan, stats=stats):
+            ...
+        print(stats)
+    """
+    if workers is None:
+        workers = -1
+    workers = _num_workers(workers)
+
+    if max_pending is None:
+        max_pending = DEFAULT_PENDING_PER_WORKER * workers
+    if max_pending < 1:
+        raise ValueError("The number of pending clips must be positive")
+
+    clips = iter(enumerate(clips))
+    # (index, future) for every submitted clip not yet returned, in order of
+    # submission
+    pending = deque()
+
+    with ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(plan,)
+        ) as pool:
+
+        def submit():
+            """ Submits the next clip, returning false if there are none """
+            entry = next(clips, None)
+            if entry is None:
+                return False
+            index, item = entry
+            pending.append((index, pool.submit(_analyse_clip, item)))
+            return True
+
+        while len(pending) < max_pending and submit():
+            pass
+
+        try:
+            for entry in _results(pending, ordered, submit, stats, plan.fs):
+                yield entry
+        finally:
+            # If the caller stops early, don't wait for the remaining clips
+            for _, future in pending:
+                future.cancel()
+
+
+def _results(pending, ordered, submit, stats, fs):
+    """
+    Generates the results of the ``pending`` futures for
+    :func:`analyse_batch`, submitting a new clip as each one is returned.
+    """
+    while pending:
+        if ordered:
+            index, future = pending.popleft()
+        else:
+            wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+            index, future = next(
+                entry for entry in pending if entry[1].done()
+            )
+            pending.remove((index, future))
+
+        result, samples = future.result()
+
+        if stats is not None:
+            stats._add(samples, fs)
+
+        submit()
+
+        yield index, result
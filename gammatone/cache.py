@@ -0,0 +1,193 @@
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+This module contains a small in-memory cache for arrays that are pure functions
+of the analysis parameters, such as filter coefficients and FFT weight
+matrices. Repeated analyses with the same parameters can then skip the filter
+design step entirely.
+
+It also has the helpers behind the ``out`` and ``workspace`` arguments of the
+analysis functions, which let a long running process reuse its output and
+scratch arrays across calls instead of allocating new ones each time.
+"""
+from __future__ import division
+from collections import OrderedDict, namedtuple
+import threading
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 128 * 2 ** 20
+
+CacheInfo = namedtuple(
+    'CacheInfo',
+    ('hits', 'misses', 'entries', 'nbytes', 'max_bytes')
+)
+
+
+def _hashable(part):
+    """
+    Converts one part of a cache key into something hashable, so that eg. a
+    sample rate given as a 0-d Numpy array (as loaded from a ``.mat`` file)
+    gives the same key as the equivalent Python number.
+    """
+    if isinstance(part, (np.ndarray, np.generic)):
+        part = np.asarray(part)
+        if part.size == 1:
+            return part.item()
+        return (part.dtype.str, part.shape, part.tobytes())
+    return part
+
+
+def _arrays(value):
+    """
+    Returns the arrays in a cached value (an array, or a possibly nested tuple
+    or list containing arrays)
+    """
+    if isinstance(value, (tuple, list)):
+        return [arr for item in value for arr in _arrays(item)]
+    if isinstance(value, np.ndarray):
+        return [value]
+    return []
+
+
+class ArrayCache:
+    """
+    A thread safe, least recently used cache of arrays (or tuples of arrays),
+    bounded by the total number of bytes held rather than the number of entries.
+
+    Cached arrays are marked read-only, so that a caller can't accidentally
+    modify the copy that will be returned to the next caller. Take a copy first
+    if you need to modify the result.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param max_bytes: the maximum total size of the cached arrays
+        """
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._max_bytes = int(max_bytes)
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, compute):
+        """
+        Returns the value cached under ``key`` (a tuple of parameters), or calls
+        ``compute()`` to create it, caches it and returns it. Values bigger than
+        the whole cache are returned without being stored.
+        """
+        key = tuple(_hashable(part) for part in key)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key][0]
+            self._misses += 1
+
+        # Compute outside the lock so that slow designs don't block hits on
+        # other keys. Two threads may race to compute the same value, which is
+        # harmless.
+        value = compute()
+
+        arrays = _arrays(value)
+        for arr in arrays:
+            arr.setflags(write=False)
+        nbytes = sum(arr.nbytes for arr in arrays)
+
+        with self._lock:
+            if key not in self._entries and nbytes <= self._max_bytes:
+                self._entries[key] = (value, nbytes)
+                self._nbytes += nbytes
+                self._evict()
+
+        return value
+
+    def _evict(self):
+        """ Drops least recently used entries until the size bound is met """
+        while self._nbytes > self._max_bytes:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= nbytes
+
+    def clear(self):
+        """ Removes all entries and resets the hit and miss counts """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def resize(self, max_bytes):
+        """
+        Changes the maximum size of the cache, evicting the least recently used
+        entries if it is now over the limit.
+        """
+        with self._lock:
+            self._max_bytes = int(max_bytes)
+            self._evict()
+
+    def info(self):
+        """
+        Returns a :class:`CacheInfo` tuple with the hit and miss counts, the
+        number of entries, the bytes currently held and the size limit.
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                len(self._entries),
+                self._nbytes,
+                self._max_bytes
+            )
+
+
+# Shared by gtgram and fft_gtgram for filter coefficients and FFT weights
+coefficient_cache = ArrayCache()
+
+
+def output_array(out, shape, dtype):
+    """
+    Returns ``out`` if it is given, after checking that it has the expected
+    ``shape`` and ``dtype``, or otherwise a new (uninitialised) array.
+    """
+    dtype = np.dtype(dtype)
+
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+
+    if out.shape != tuple(shape) or out.dtype != dtype:
+        raise ValueError(
+            "Output array must have shape {} and dtype {}, not {} and {}"
+            .format(tuple(shape), dtype, out.shape, out.dtype)
+        )
+
+    return out
+
+
+def workspace_array(workspace, key, shape, dtype):
+    """
+    Returns an uninitialised scratch array for the intermediate result named
+    ``key``. If ``workspace`` is a dictionary, the array is stored in it and
+    returned again by later calls with the same ``key``, ``shape`` and
+    ``dtype``, so that repeated analyses of the same size don't allocate new
+    memory. If ``workspace`` is ``None``, a new array is returned.
+
+    The same workspace can be shared by different functions, but not by
+    concurrent calls from several threads.
+    """
+    dtype = np.dtype(dtype)
+    shape = tuple(shape)
+
+    if workspace is None:
+        return np.empty(shape, dtype=dtype)
+
+    array = workspace.get(key)
+
+    if array is None or array.shape != shape or array.dtype != dtype:
+        array = np.empty(shape, dtype=dtype)
+        workspace[key] = array
+
+    return array
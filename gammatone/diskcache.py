@@ -0,0 +1,277 @@
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+This module contains :class:`DiskCache`, an on-disk cache of analysis results
+for the ``cache`` argument of :func:`gammatone.gtgram.gtgram` and
+:func:`gammatone.fftweight.fft_gtgram`. Results are keyed on a hash of the
+waveform, the analysis parameters and the toolkit version, so a pipeline that
+re-analyses the same audio (eg. when a job is retried) can load the earlier
+result instead of recalculating it.
+"""
+from __future__ import division
+from collections import namedtuple
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from . import __version__
+from .cache import _hashable, output_array
+
+DEFAULT_DISK_MAX_BYTES = 1024 * 2 ** 20
+
+ENTRY_SUFFIX = '.npy'
+
+TEMP_SUFFIX = '.tmp'
+
+# Temporary files older than this (in seconds) were left by writers that
+# crashed before renaming them into place, and are deleted
+TEMP_MAX_AGE = 3600
+
+DiskCacheInfo = namedtuple(
+    'DiskCacheInfo',
+    ('hits', 'misses', 'bytes_saved', 'entries', 'nbytes', 'max_bytes')
+)
+
+
+def _digest(key):
+    """
+    Returns the hexadecimal BLAKE2b digest of ``key`` (a tuple of parameters
+    and arrays) and the toolkit version. Arrays are hashed by their type, shape
+    and contents; everything else by the ``repr`` of its
+    :func:`gammatone.cache._hashable` form, so eg. ``np.int64(1)`` and ``1.0``
+    give the same digest.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr(__version__).encode())
+
+    for part in key:
+        if isinstance(part, np.ndarray) and part.size != 1:
+            part = np.ascontiguousarray(part)
+            digest.update(repr(('array', part.dtype.str, part.shape)).encode())
+            digest.update(memoryview(part).cast('B'))
+        else:
+            part = _hashable(part)
+            # Equal numbers give equal digests, as they do dictionary keys
+            if isinstance(part, (int, float)) and not isinstance(part, bool):
+                part = float(part)
+            digest.update(repr(part).encode())
+
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    A least recently used cache of arrays stored as ``.npy`` files in a
+    directory, bounded by the total size of the files.
+
+    Entries are written to a temporary file and then renamed into place, so
+    several processes (eg. the workers of a batch job) can share a directory:
+    readers only ever see complete entries, and a worker that loses a race to
+    write an entry just replaces it with an identical one. Entries are
+    memory-mapped read-only when they are loaded, so a large result is only
+    read from disk as it is used.
+
+    Each load marks the entry as recently used by updating its modification
+    time, and the oldest entries are deleted after each write until the
+    directory is within ``max_bytes``. The hit and miss counts are for this
+    object only. Temporary files left by writers that crashed are deleted once
+    they are more than ``TEMP_MAX_AGE`` seconds old.
+
+    The keys include ``gammatone.__version__``, so entries written by one
+    version are never loaded by another. Any release that changes the results
+    of the analysis functions must therefore bump the version, or stale
+    results will be loaded from existing caches.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_DISK_MAX_BYTES):
+        """
+        :param path: the cache directory, which is created if necessary
+        :param max_bytes: the maximum total size of the cache entries
+        """
+        self.path = os.fspath(path)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._max_bytes = int(max_bytes)
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    def _entry_path(self, digest):
+        return os.path.join(self.path, digest + ENTRY_SUFFIX)
+
+    def _entries(self):
+        """
+        Returns ``(mtime, size, path)`` for every entry, ignoring entries that
+        are deleted (eg. by another process) while the directory is scanned
+        """
+        entries = []
+
+        for name in os.listdir(self.path):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+
+            path = os.path.join(self.path, name)
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        return entries
+
+    def _remove_orphans(self, max_age=TEMP_MAX_AGE):
+        """
+        Deletes temporary files more than ``max_age`` seconds old, which were
+        left by writers that crashed before renaming them into place
+        """
+        cutoff = time.time() - max_age
+
+        for name in os.listdir(self.path):
+            if not name.endswith(TEMP_SUFFIX):
+                continue
+
+            path = os.path.join(self.path, name)
+
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def load(self, key):
+        """
+        Returns the (read-only, memory-mapped) array cached under ``key``, or
+        ``None`` if there isn't one. This counts as a hit or a miss.
+        """
+        path = self._entry_path(_digest(key))
+
+        try:
+            os.utime(path)
+            value = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            value = None
+
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._bytes_saved += value.nbytes
+
+        return value
+
+    def store(self, key, value):
+        """
+        Writes the array ``value`` to the cache under ``key``, and evicts the
+        least recently used entries if the cache is now over its size limit.
+        Arrays bigger than the whole cache are not stored.
+        """
+        value = np.asarray(value)
+
+        if value.nbytes > self._max_bytes:
+            return
+
+        handle, temp_path = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=self.path)
+
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                np.save(temp_file, value)
+            os.replace(temp_path, self._entry_path(_digest(key)))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        self._evict()
+
+    def get(self, key, compute, out=None):
+        """
+        Returns the array cached under ``key`` (a tuple of parameters and
+        arrays), or calls ``compute()`` to calculate it and stores the result.
+
+        If ``out`` is given, a cached result is copied into it and ``out`` is
+        returned, so that the caller gets the same array whether or not there
+        was a hit.
+        """
+        value = self.load(key)
+
+        if value is None:
+            value = compute()
+            self.store(key, value)
+
+        if out is None or value is out:
+            return value
+
+        output_array(out, value.shape, value.dtype)[...] = value
+        return out
+
+    def _evict(self):
+        """
+        Deletes the oldest entries until the size bound is met, and any
+        orphaned temporary files
+        """
+        self._remove_orphans()
+        entries = sorted(self._entries())
+        nbytes = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if nbytes <= self._max_bytes:
+                break
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+            nbytes -= size
+
+    def clear(self):
+        """
+        Deletes all entries and orphaned temporary files, and resets the
+        counters
+        """
+        self._remove_orphans()
+
+        for _, _, path in self._entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._bytes_saved = 0
+
+    def resize(self, max_bytes):
+        """
+        Changes the maximum size of the cache, deleting the least recently used
+        entries if it is now over the limit.
+        """
+        self._max_bytes = int(max_bytes)
+        self._evict()
+
+    def info(self):
+        """
+        Returns a :class:`DiskCacheInfo` tuple with the hit and miss counts, the
+        total size of the results loaded instead of calculated, the number of
+        entries, the bytes currently stored and the size limit.
+        """
+        entries = self._entries()
+
+        with self._lock:
+            return DiskCacheInfo(
+                self._hits,
+                self._misses,
+                self._bytes_saved,
+                len(entries),
+                sum(size for _, size, _ in entries),
+                self._max_bytes
+            )
@@ -8,14 +8,50 @@ bandwidth gammatone filters.
 """
 from __future__ import division
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import os
 
 import numpy as np
 import scipy as sp
+from scipy import fft as spfft
 from scipy import signal as sgn
+from scipy import stats
+
+from .cache import coefficient_cache, output_array, workspace_array
+
+try:
+    from . import jit
+except ImportError:
+    jit = None
 
 DEFAULT_FILTER_NUM = 100
 DEFAULT_LOW_FREQ = 100
 DEFAULT_HIGH_FREQ = 44100 / 4
+DEFAULT_DECAY_TOLERANCE = 1e-6
+DEFAULT_FIR_TOLERANCE = 1e-10
+
+ENGINES = ('iir', 'fir')
+OUTPUTS = ('waveform', 'energy', 'analytic')
+BACKENDS = ('scipy', 'numba')
+FIR_GROUP_SAMPLES = 2 ** 22
+
+# Energy output: order and cutoff (as a fraction of the output Nyquist
+# frequency) of the smoothing filter, and the approximate block length used
+ENERGY_FILTER_ORDER = 4
+ENERGY_FILTER_CUTOFF = 0.8
+ENERGY_BLOCK_SAMPLES = 8192
+
+# Multirate filtering: channels are run at a decimated rate if everything
+# within this many ERBs above their centre frequency falls below this fraction
+# of the decimated sample rate
+DEFAULT_MULTIRATE_MARGIN = 12
+MULTIRATE_MAX_FRACTION = 0.4
+
+MultirateBand = namedtuple(
+    'MultirateBand',
+    ('decimation', 'fs', 'lo', 'hi', 'coefs')
+)
 
 
 def erb_point(low_freq, high_freq, fraction):
@@ -116,16 +152,15 @@ def make_erb_filters(fs, centre_freqs, width=1.0):
     instability. Thanks to Julius Smith for leading me to the proper
     explanation.
     
-    Execute the following code to evaluate the frequency response of a 10
-    channel filterbank::
+    To evaluate the frequency response of a 10 channel filterbank, use
+    :func:`erb_frequency_response`, which evaluates the transfer function of
+    every channel directly rather than filtering an impulse::
     
-        fcoefs = MakeERBFilters(16000,10,100);
-        y = ERBFilterBank([1 zeros(1,511)], fcoefs);
-        resp = 20*log10(abs(fft(y')));
-        freqScale = (0:511)/512*16000;
-        semilogx(freqScale(1:255),resp(1:255,:));
-        axis([100 16000 -60 0])
-        xlabel('Frequency (Hz)'); ylabel('Filter Response (dB)');
+        fcoefs = make_erb_filters(16000, centre_freqs(16000, 10, 100))
+        freqs = np.geomspace(100, 8000, 1000)
+        resp = erb_frequency_response(fcoefs, 16000, freqs)
+        matplotlib.pyplot.semilogx(freqs, 20 * np.log10(np.abs(resp)).T)
+        matplotlib.pyplot.axis([100, 8000, -60, 0])
     
     | Rewritten by Malcolm Slaney@Interval.  June 11, 1998.
     | (c) 1998 Interval Research Corporation
@@ -193,17 +228,223 @@ def make_erb_filters(fs, centre_freqs, width=1.0):
     return fcoefs
 
 
-def erb_filterbank(wave, coefs):
+def erb_sos(coefs):
+    """
+    :param coefs: gammatone filter coefficients (see :func:`make_erb_filters`)
+    :return: an array of shape ``(channels, 4, 6)`` of second order sections
+
+    Converts a gammatone coefficient array into the second order section (SOS)
+    form used by :func:`scipy.signal.sosfilt`. Each channel becomes a cascade of
+    four biquads, where each row is ``[b0, b1, b2, a0, a1, a2]``.
+
+    The numerators ``(A0, A1k, A2)`` and shared denominator ``(B0, B1, B2)`` are
+    taken directly from the coefficient array. The channel gain is split evenly
+    across the four sections (each numerator is divided by the fourth root of
+    the gain), so that every intermediate stage of the cascade stays close to
+    unity gain at the centre frequency instead of the whole correction being
+    applied at the end.
+    """
+    coefs = np.asarray(coefs, dtype=np.float64)
+    channels = coefs.shape[0]
+
+    sos = np.empty((channels, 4, 6))
+
+    section_gain = coefs[:, 9] ** 0.25
+
+    # A0, A1k, A2 for each of the four sections
+    for sec, a1_idx in enumerate((1, 2, 3, 4)):
+        sos[:, sec, 0] = coefs[:, 0]
+        sos[:, sec, 1] = coefs[:, a1_idx]
+        sos[:, sec, 2] = coefs[:, 5]
+        sos[:, sec, :3] /= section_gain[:, None]
+
+    # B0, B1, B2 are shared by all sections
+    sos[:, :, 3:6] = coefs[:, None, 6:9]
+
+    return sos
+
+
+def erb_analytic_sos(coefs):
+    """
+    :param coefs: gammatone filter coefficients (see :func:`make_erb_filters`)
+    :return: a complex array of shape ``(channels, 4, 6)`` of second order
+      sections
+
+    Converts a gammatone coefficient array into a cascade of four complex
+    one-pole filters per channel, for the ``'analytic'`` output of
+    :func:`erb_filterbank`. Each section is ``g / (1 - p z^-1)``, where the pole
+    ``p`` is the positive frequency pole of the real filter (taken from ``B1``
+    and ``B2``, so the ERB bandwidths are the same as in
+    :func:`make_erb_filters`). This is a one-pole low-pass filter shifted up to
+    the centre frequency, so it only passes positive frequencies, and its output
+    is the analytic signal of the channel.
+
+    The gain ``g`` is chosen so that the response at the centre frequency is
+    two, since a real signal's positive frequency component has half of its
+    amplitude. The magnitude of the output is then the envelope of the real
+    filter's output, and half the magnitude of the response matches the real
+    filterbank (see :func:`erb_frequency_response`) to within a tenth of a
+    decibel across the passband. The exception is channels whose passband
+    reaches zero or half the sampling rate, where the real filter also passes
+    the negative frequency image.
+    """
+    coefs = np.asarray(coefs, dtype=np.float64)
+    channels = coefs.shape[0]
+
+    # B1 = -2 r cos(theta) and B2 = r^2 for the pole r exp(1j theta)
+    radius = np.sqrt(coefs[:, 8])
+    theta = np.arccos(np.clip(-coefs[:, 7] / (2 * radius), -1, 1))
+    pole = radius * np.exp(1j * theta)
+
+    sos = np.zeros((channels, 4, 6), dtype=np.complex128)
+
+    # At the centre frequency each section's response is g / (1 - r)
+    sos[:, :, 0] = ((1 - radius) * 2 ** 0.25)[:, None]
+    sos[:, :, 3] = 1
+    sos[:, :, 4] = -pole[:, None]
+
+    return sos
+
+
+def erb_frequency_response(coefs, fs, freqs):
+    """
+    :param coefs: gammatone filter coefficients (see :func:`make_erb_filters`)
+    :param fs: the sampling frequency the coefficients were designed for
+    :param freqs: the frequencies to evaluate the response at, in Hz (any
+      shape)
+    :return: a complex array of shape ``(channels,) + freqs.shape``
+
+    Evaluates the complex frequency response of every channel of the
+    filterbank, ie. the product of the transfer functions of its four second
+    order sections, divided by the channel gain, on the unit circle at
+    ``z = exp(2j * pi * freqs / fs)``. This is the response that
+    :func:`erb_filterbank` applies, without the cost of filtering an impulse,
+    and on any frequency grid rather than the bins of an FFT.
+
+    The calculation is vectorised over channels and frequencies, in the same
+    way as :func:`gammatone.fftweight.fft_weights`.
+    """
+    coefs = np.asarray(coefs, dtype=np.float64)
+    freqs = np.asarray(freqs, dtype=np.float64)
+
+    # Coefficients broadcast along the trailing frequency axes
+    shape = (coefs.shape[0],) + (1,) * freqs.ndim
+    A0, A11, A12, A13, A14, A2, B0, B1, B2, gain = (
+        col.reshape(shape) for col in coefs.T
+    )
+
+    zinv = np.exp(-2j * np.pi * freqs / fs)[None, ...]
+    zinv2 = zinv ** 2
+
+    denominator = B0 + B1 * zinv + B2 * zinv2
+
+    response = 1 / gain
+    for A1 in (A11, A12, A13, A14):
+        response = response * (A0 + A1 * zinv + A2 * zinv2) / denominator
+
+    return response
+
+
+def erb_filterbank(
+        wave,
+        coefs,
+        dtype=np.float64,
+        workers=None,
+        engine='iir',
+        fir_tolerance=DEFAULT_FIR_TOLERANCE,
+        output='waveform',
+        decimation=1,
+        backend=None,
+        out=None,
+        workspace=None,
+    ):
     """
-    :param wave: input data (one dimensional sequence)
+    :param wave: input data (one dimensional sequence, or an array of signals
+      with time along the last axis)
     :param coefs: gammatone filter coefficients
+    :param dtype: the floating point type used for filtering and for the
+      output (eg. ``np.float32`` to halve memory use and bandwidth)
+    :param workers: the number of threads to split the channels across, or
+      ``-1`` to use one per CPU (default is to filter on the calling thread).
+      For the ``'fir'`` engine it is instead the number of threads that
+      :mod:`scipy.fft` uses for each transform
+    :param engine: ``'iir'`` to run the recursive filters directly, or
+      ``'fir'`` to apply truncated impulse responses by FFT convolution
+    :param fir_tolerance: the fraction of each impulse response's energy that
+      the ``'fir'`` engine may discard (see :func:`erb_impulse_responses`)
+    :param output: ``'waveform'`` for the filter outputs, ``'energy'`` for
+      the smoothed and decimated energy of each channel, or ``'analytic'`` for
+      the complex analytic signal of each channel
+    :param decimation: the decimation factor for ``'energy'`` output
+    :param backend: ``'scipy'`` or ``'numba'``, the implementation of the
+      ``'iir'`` engine (default is ``'numba'`` if it is installed)
+    :param out: an array to write the result into, which must have the shape
+      and dtype of the result
+    :param workspace: a dictionary of scratch arrays to reuse across calls (see
+      :func:`gammatone.cache.workspace_array`)
     
     Process an input waveform with a gammatone filter bank. This function takes
     a single sound vector, and returns an array of filter outputs, one channel
     per row.
+
+    ``wave`` can also be a batch of signals of equal length, eg. with shape
+    ``(n_signals, n_samples)``. This might be a set of clips, or the channels of
+    a multichannel recording (transposed from the ``(n_samples, n_channels)``
+    layout returned by :func:`scipy.io.wavfile.read`). The result then has shape
+    ``(n_signals, channels, n_samples)``, and every signal is filtered in the
+    same pass over the filterbank channels.
+
+    The coefficients are always designed in double precision, and only the
+    final second order sections are rounded to ``dtype``. Single precision
+    output agrees with the double precision reference data to a relative error
+    of around ``1e-4`` for typical filterbanks.
+
+    Channels are independent, so with ``workers`` they are divided into
+    contiguous groups that are filtered concurrently. Scipy releases the GIL
+    while filtering, so this scales with the number of cores. Each thread
+    writes directly into its own rows of the output array.
     
     The fcoefs parameter, which completely specifies the Gammatone filterbank,
     should be designed with the :func:`make_erb_filters` function.
+
+    The whole bank is converted to second order sections with :func:`erb_sos`,
+    and each channel's four-section cascade is run in a single
+    :func:`scipy.signal.sosfilt` call, written directly into the output array.
+    If `numba <https://numba.pydata.org/>`_ is installed, the ``'numba'``
+    backend instead runs every channel in one compiled kernel (see
+    :mod:`gammatone.jit`), which avoids the per-channel overhead. Both backends
+    give identical results, and both release the GIL for ``workers``.
+    The kernel is compiled on first use and cached on disk, and
+    ``benchmarks/jit_backend.py`` compares their speed.
+
+    The ``'fir'`` engine instead truncates each channel's impulse response
+    (see :func:`erb_impulse_responses`) and applies it by overlap-save block
+    convolution. Each block of the input is transformed once and shared by all
+    channels, and the filter spectra are cached in
+    :data:`gammatone.cache.coefficient_cache`. This can be faster than the
+    recursive filters for many channels and long signals (see
+    ``benchmarks/fir_engine.py``), at the cost of an error that shrinks with
+    ``fir_tolerance``. The channels are not split across ``workers`` here:
+    each transform is passed to :mod:`scipy.fft` with ``workers`` threads,
+    which only helps when several signals or channels are transformed at
+    once.
+
+    With ``output='energy'``, each channel's output is squared, low-pass
+    filtered and decimated by ``decimation`` while the signal is filtered, so
+    the result has ``ceil(n_samples / decimation)`` samples per channel. This
+    is enough for analyses that only need each channel's energy at a low frame
+    rate, and the full rate output is never stored: the signal is processed in
+    blocks of a few thousand samples. The smoothing filter is a fourth order
+    Butterworth low-pass with unity gain at DC and its cutoff at 0.8 times the
+    output Nyquist frequency. With a ``decimation`` of one the energy is
+    returned without smoothing. This output requires the ``'iir'`` engine.
+
+    With ``output='analytic'``, each channel is instead a cascade of complex
+    one-pole filters (see :func:`erb_analytic_sos`), and the result is the
+    complex analytic signal of the channel, of the complex counterpart of
+    ``dtype``. Its magnitude is the channel's Hilbert envelope and its angle the
+    instantaneous phase, without a separate Hilbert transform. This output also
+    requires the ``'iir'`` engine.
     
     | Malcolm Slaney @ Interval, June 11, 1998.
     | (c) 1998 Interval Research Corporation
@@ -211,30 +452,636 @@ def erb_filterbank(wave, coefs):
     |
     | (c) 2013 Jason Heeris (Python implementation)
     """
-    output = np.zeros((coefs[:,9].shape[0], wave.shape[0]))
-    
-    gain = coefs[:, 9]
-    # A0, A11, A2
-    As1 = coefs[:, (0, 1, 5)]
-    # A0, A12, A2
-    As2 = coefs[:, (0, 2, 5)]
-    # A0, A13, A2
-    As3 = coefs[:, (0, 3, 5)]
-    # A0, A14, A2
-    As4 = coefs[:, (0, 4, 5)]
-    # B0, B1, B2
-    Bs = coefs[:, 6:9]
-    
-    # Loop over channels
-    for idx in range(0, coefs.shape[0]):
-        # These seem to be reversed (in the sense of A/B order), but that's what
-        # the original code did...
-        # Replacing these with polynomial multiplications reduces both accuracy
-        # and speed.
-        y1 = sgn.lfilter(As1[idx], Bs[idx], wave)
-        y2 = sgn.lfilter(As2[idx], Bs[idx], y1)
-        y3 = sgn.lfilter(As3[idx], Bs[idx], y2)
-        y4 = sgn.lfilter(As4[idx], Bs[idx], y3)
-        output[idx, :] = y4 / gain[idx]
-        
+    if engine not in ENGINES:
+        raise ValueError(
+            "Unknown filterbank engine {!r}, must be one of {}".format(
+                engine, ", ".join(ENGINES)
+        ))
+
+    if output not in OUTPUTS:
+        raise ValueError(
+            "Unknown filterbank output {!r}, must be one of {}".format(
+                output, ", ".join(OUTPUTS)
+        ))
+
+    wave = np.asarray(wave, dtype=dtype)
+
+    if output == 'energy':
+        if engine != 'iir':
+            raise ValueError("Energy output requires the 'iir' engine")
+        return _energy_filterbank(
+            wave, coefs, int(decimation), workers, backend, out
+        )
+
+    if output == 'analytic':
+        if engine != 'iir':
+            raise ValueError("Analytic output requires the 'iir' engine")
+        dtype = np.result_type(dtype, np.complex64)
+        wave = wave.astype(dtype)
+        sos = erb_analytic_sos(coefs).astype(dtype)
+    elif engine == 'fir':
+        return _fir_filterbank(
+            wave, coefs, fir_tolerance, workers, out, workspace
+        )
+    else:
+        sos = erb_sos(coefs).astype(dtype)
+
+    output = output_array(
+        out, wave.shape[:-1] + (sos.shape[0], wave.shape[-1]), dtype
+    )
+    _filter_channels(sos, wave, output, workers=workers, backend=backend)
+
+    return output
+
+
+def _num_workers(workers):
+    """ Interprets a ``workers`` argument as a number of threads """
+    if workers is None:
+        return 1
+    if workers == -1:
+        return os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(
+            "Number of workers must be positive or -1, not {}".format(workers)
+        )
+    return int(workers)
+
+
+def _backend(backend):
+    """ Interprets a ``backend`` argument, defaulting to numba if available """
+    if backend is None:
+        return 'scipy' if jit is None else 'numba'
+    if backend not in BACKENDS:
+        raise ValueError(
+            "Unknown filterbank backend {!r}, must be one of {}".format(
+                backend, ", ".join(BACKENDS)
+        ))
+    if backend == 'numba' and jit is None:
+        raise ImportError("The 'numba' backend requires numba")
+    return backend
+
+
+def _filter_channels(sos, wave, output, zi=None, workers=None, backend=None):
+    """
+    Runs each channel's cascade in ``sos`` over the last axis of ``wave``,
+    writing into ``output[..., channel, :]``. Any leading axes of ``wave`` are
+    filtered together in the same ``sosfilt`` call. If ``zi`` is given it is
+    used as the initial state of every channel (shape ``(channels, 4, ..., 2)``,
+    as for ``sosfilt``) and is updated in place with the final state.
+
+    With more than one worker, the channels are split into contiguous groups
+    and each group is filtered on its own thread into its slice of ``output``.
+    """
+    channels = sos.shape[0]
+    workers = min(_num_workers(workers), channels)
+    backend = _backend(backend)
+
+    # sosfilt rejects empty signals, and they leave the state unchanged anyway
+    if wave.shape[-1] == 0:
+        return
+
+    if workers > 1:
+        bounds = np.linspace(0, channels, workers + 1).astype(int)
+
+        def filter_group(lo, hi):
+            _filter_channels(
+                sos[lo:hi],
+                wave,
+                output[..., lo:hi, :],
+                None if zi is None else zi[lo:hi],
+                backend=backend
+            )
+
+        with ThreadPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(filter_group, lo, hi)
+                for lo, hi in zip(bounds[:-1], bounds[1:])
+            ]
+            for future in futures:
+                future.result()
+
+        return
+
+    if backend == 'numba':
+        jit.sos_cascade(sos, wave, output, zi)
+        return
+
+    # scipy only accepts one cascade per sosfilt call, so the loop over
+    # channels remains, but each channel is now a single pass over the signal
+    # rather than four lfilter calls with full length temporaries.
+    for idx in range(sos.shape[0]):
+        if zi is None:
+            output[..., idx, :] = sgn.sosfilt(sos[idx], wave)
+        else:
+            output[..., idx, :], zi[idx] = sgn.sosfilt(
+                sos[idx], wave, zi=zi[idx]
+            )
+
+
+def _energy_filterbank(wave, coefs, decimation, workers, backend, out):
+    """
+    Implements ``output='energy'`` for :func:`erb_filterbank`, by streaming
+    ``wave`` through a :class:`GammatoneFilterbank` in blocks.
+    """
+    if decimation < 1:
+        raise ValueError("Decimation factor must be positive")
+
+    dtype = wave.dtype
+    batch_shape = wave.shape[:-1]
+    length = wave.shape[-1]
+
+    fbank = GammatoneFilterbank(
+        coefs, dtype=dtype, workers=workers, batch_shape=batch_shape,
+        backend=backend
+    )
+    channels = fbank.channels
+
+    # Blocks are a multiple of the decimation factor, so every block starts
+    # on an output sample
+    block = decimation * max(1, ENERGY_BLOCK_SAMPLES // decimation)
+
+    output = output_array(
+        out, batch_shape + (channels, -(-length // decimation)), dtype
+    )
+
+    if decimation > 1:
+        # The same smoothing filter applies to every channel, so one sosfilt
+        # call covers the whole block
+        smoothing = sgn.butter(
+            ENERGY_FILTER_ORDER,
+            ENERGY_FILTER_CUTOFF / decimation,
+            output='sos'
+        ).astype(dtype)
+        zi = np.zeros(
+            (smoothing.shape[0],) + batch_shape + (channels, 2),
+            dtype=dtype
+        )
+
+    for start in range(0, length, block):
+        xe = fbank.process(wave[..., start:start + block])
+        np.square(xe, out=xe)
+
+        if decimation > 1:
+            xe, zi = sgn.sosfilt(smoothing, xe, axis=-1, zi=zi)
+
+        first = start // decimation
+        decimated = xe[..., ::decimation]
+        output[..., first:first + decimated.shape[-1]] = decimated
+
+    return output
+
+
+def erb_decay_length(coefs, tolerance=DEFAULT_DECAY_TOLERANCE):
+    """
+    :param coefs: gammatone filter coefficients (see :func:`make_erb_filters`)
+    :param tolerance: the fraction of the impulse response envelope that may
+      lie beyond the returned length
+    :return: an integer array with the decay length, in samples, of each channel
+
+    Estimates how long each channel's impulse response takes to decay, from the
+    pole radius ``r = sqrt(B2)`` of its four second order sections. The eight
+    poles of a channel all have radius ``r``, so its impulse response is
+    bounded by a multiple of the envelope ``C(n + 7, 7) * r ** n``. Normalised,
+    this envelope is a negative binomial distribution, and the returned length
+    ``L`` is the point where its tail beyond ``L`` falls below ``tolerance``.
+    """
+    coefs = np.asarray(coefs)
+    r = np.sqrt(coefs[:, 8])
+    length = stats.nbinom.isf(tolerance, 8, 1 - r)
+    return np.ceil(length).astype(int)
+
+
+def erb_impulse_responses(coefs, tolerance=DEFAULT_FIR_TOLERANCE):
+    """
+    :param coefs: gammatone filter coefficients (see :func:`make_erb_filters`)
+    :param tolerance: the fraction of each impulse response's energy that may
+      be discarded
+    :return: an array of shape ``(channels, length)`` with the impulse
+      responses, zero padded to the length of the longest one
+
+    Calculates each channel's impulse response, truncated at the point where
+    the energy remaining in its tail is less than ``tolerance`` times its total
+    energy.
+    """
+    coefs = np.asarray(coefs)
+
+    # The envelope bound is always longer than the energy based length, since
+    # it bounds the absolute value rather than the square
+    length = int(erb_decay_length(coefs, tolerance).max()) + 1
+    impulse = np.zeros(length)
+    impulse[0] = 1
+
+    responses = erb_filterbank(impulse, coefs)
+
+    energy = np.cumsum(responses[:, ::-1] ** 2, axis=1)[:, ::-1]
+    keep = energy > tolerance * energy[:, :1]
+    lengths = keep.sum(axis=1)
+    responses[~keep] = 0
+
+    return responses[:, :lengths.max()]
+
+
+def _fir_spectra(coefs, tolerance):
+    """
+    Returns the cached filter spectra used by the ``'fir'`` engine, as a tuple
+    of ``(lo, hi, filter_length, spectra)`` groups. Each group covers channels
+    ``lo`` to ``hi`` whose truncated impulse responses fit the same FFT size.
+    """
+    def design():
+        responses = erb_impulse_responses(coefs, tolerance)
+        lengths = np.maximum(
+            1,
+            responses.shape[1]
+            - np.argmax(responses[:, ::-1] != 0, axis=1)
+        )
+        # About four times the filter length keeps the overlap (and so the
+        # wasted part of each transform) to around a quarter of each block
+        nffts = 2 ** np.ceil(np.log2(4 * lengths)).astype(int)
+
+        groups = []
+        lo = 0
+        for hi in range(1, len(nffts) + 1):
+            if hi == len(nffts) or nffts[hi] != nffts[lo]:
+                length = int(lengths[lo:hi].max())
+                spectra = spfft.rfft(
+                    responses[lo:hi, :length], int(nffts[lo]), axis=-1
+                )
+                groups.append((lo, hi, length, spectra))
+                lo = hi
+
+        return tuple(groups)
+
+    return coefficient_cache.get(
+        ('fir_spectra', np.asarray(coefs), tolerance),
+        design
+    )
+
+
+def _fir_filterbank(wave, coefs, tolerance, workers, out, workspace):
+    """
+    Implements the ``'fir'`` engine of :func:`erb_filterbank` by overlap-save
+    convolution with the truncated impulse responses.
+    """
+    groups = _fir_spectra(coefs, tolerance)
+    channels = groups[-1][1]
+    length = wave.shape[-1]
+    max_overlap = max(group[2] for group in groups) - 1
+    workers = _num_workers(workers)
+
+    # Prepend the zero initial state, so every block can look back by the
+    # filter length
+    padded = workspace_array(
+        workspace,
+        'fir_padded',
+        wave.shape[:-1] + (max_overlap + length,),
+        wave.dtype
+    )
+    padded[..., :max_overlap] = 0
+    padded[..., max_overlap:] = wave
+
+    output = output_array(
+        out, wave.shape[:-1] + (channels, length), wave.dtype
+    )
+
+    for lo, hi, filter_length, spectra in groups:
+        spectra = spectra.astype(
+            np.result_type(wave.dtype, np.complex64),
+            copy=False
+        )
+        nfft = 2 * (spectra.shape[1] - 1)
+        overlap = filter_length - 1
+        offset = max_overlap - overlap
+        # Each transform yields this many output samples that are free of
+        # circular wrap-around
+        block = nfft - overlap
+        # Channels are processed in smaller groups to bound the size of the
+        # temporaries
+        step = max(1, FIR_GROUP_SAMPLES // nfft)
+
+        for start in range(0, length, block):
+            stop = min(start + block, length)
+
+            spectrum = spfft.rfft(
+                padded[..., offset + start:offset + stop + overlap],
+                nfft, axis=-1, workers=workers
+            )[..., None, :]
+
+            for sub in range(lo, hi, step):
+                sub_hi = min(sub + step, hi)
+                filtered = spfft.irfft(
+                    spectrum * spectra[sub - lo:sub_hi - lo],
+                    nfft, axis=-1, workers=workers
+                )
+                output[..., sub:sub_hi, start:stop] = \
+                    filtered[..., overlap:overlap + stop - start]
+
     return output
+
+
+def erb_filterbank_segmented(
+        wave,
+        coefs,
+        segments=None,
+        tolerance=DEFAULT_DECAY_TOLERANCE,
+        dtype=np.float64,
+        workers=None,
+    ):
+    """
+    :param wave: input data, as for :func:`erb_filterbank`
+    :param coefs: gammatone filter coefficients
+    :param segments: the number of time segments to split ``wave`` into
+      (default is one per worker)
+    :param tolerance: the impulse response decay tolerance used to choose the
+      pre-roll (see :func:`erb_decay_length`)
+    :param dtype: the floating point type used for filtering and the output
+    :param workers: the number of processes to use, or ``-1`` for one per CPU
+      (default is one per CPU)
+
+    Process an input waveform with a gammatone filter bank, by cutting it into
+    time segments that are filtered in parallel in a process pool. This is
+    useful when there are few channels but a very long signal, where splitting
+    up the channels (as with the ``workers`` argument of
+    :func:`erb_filterbank`) doesn't help.
+
+    Every segment after the first starts filtering from zero state at a
+    pre-roll of :func:`erb_decay_length` samples (for the slowest channel)
+    before its start, and the pre-roll output is discarded. The error at the
+    start of each segment is then the response to input older than the
+    pre-roll, which is bounded by ``tolerance`` times the peak input times the
+    sum of the impulse response envelope. In practice the maximum error relative
+    to each channel's peak output is well below ``tolerance``.
+    """
+    wave = np.asarray(wave)
+    length = wave.shape[-1]
+
+    if workers is None:
+        workers = -1
+    workers = _num_workers(workers)
+    segments = workers if segments is None else int(segments)
+    segments = max(1, min(segments, length))
+
+    preroll = int(erb_decay_length(coefs, tolerance).max())
+    bounds = np.linspace(0, length, segments + 1).astype(int)
+
+    out_shape = wave.shape[:-1] + (np.shape(coefs)[0], length)
+    out_dtype = np.dtype(dtype)
+
+    # The input and output live in shared memory, so that workers only receive
+    # the segment bounds and write their results in place, rather than
+    # pickling whole segments back and forth.
+    shm_in = shared_memory.SharedMemory(create=True, size=max(1, wave.nbytes))
+    shm_out = shared_memory.SharedMemory(
+        create=True,
+        size=max(1, int(np.prod(out_shape)) * out_dtype.itemsize)
+    )
+
+    try:
+        np.ndarray(wave.shape, wave.dtype, buffer=shm_in.buf)[...] = wave
+
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(
+                    _filter_shared_segment,
+                    coefs, out_dtype,
+                    (shm_in.name, wave.shape, wave.dtype),
+                    (shm_out.name, out_shape),
+                    max(0, lo - preroll), lo, hi
+                )
+                for lo, hi in zip(bounds[:-1], bounds[1:])
+            ]
+            for future in futures:
+                future.result()
+
+        output = np.ndarray(out_shape, out_dtype, buffer=shm_out.buf).copy()
+    finally:
+        for shm in (shm_in, shm_out):
+            shm.close()
+            shm.unlink()
+
+    return output
+
+
+def _filter_shared_segment(coefs, dtype, wave_spec, out_spec, start, lo, hi):
+    """
+    Process pool task for :func:`erb_filterbank_segmented`. Filters the input
+    from ``start`` to ``hi`` and writes the part from ``lo`` onwards into the
+    shared output array.
+    """
+    in_name, in_shape, in_dtype = wave_spec
+    out_name, out_shape = out_spec
+
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+
+    try:
+        wave = np.ndarray(in_shape, in_dtype, buffer=shm_in.buf)
+        output = np.ndarray(out_shape, dtype, buffer=shm_out.buf)
+        segment = erb_filterbank(wave[..., start:hi], coefs, dtype)
+        output[..., lo:hi] = segment[..., lo - start:]
+        del wave, output
+    finally:
+        shm_in.close()
+        shm_out.close()
+
+
+def multirate_bands(
+        fs,
+        centre_freqs,
+        width=1.0,
+        max_decimation=None,
+        margin=DEFAULT_MULTIRATE_MARGIN,
+    ):
+    """
+    :param fs: the sampling rate of the input
+    :param centre_freqs: the centre frequencies of the filterbank, in ascending
+      or descending order
+    :param width: the ERB width factor (see :func:`make_erb_filters`)
+    :param max_decimation: the largest decimation factor to use (a power of
+      two; default is no limit)
+    :param margin: the number of ERBs above each centre frequency that must
+      stay below ``0.4`` times the decimated sample rate (default ``12``)
+    :return: a list of :class:`MultirateBand` tuples, one per decimation factor
+      that is used, in order of the channels
+
+    Groups the channels of a filterbank into octave bands that can be computed
+    at a decimated sample rate of ``fs / decimation``, where ``decimation`` is a
+    power of two. A channel is moved down an octave as long as its passband
+    and upper skirt stay clear of the anti-alias transition band. A fourth order
+    gammatone is about 50dB down at 4 ERBs from its centre frequency, but the
+    skirts of the filters designed at a low sample rate differ from the full
+    rate design close to the Nyquist frequency, so the default margin is wider
+    than that (see :func:`gammatone.gtgram.gtgram` for the effect on
+    accuracy). Each band's
+    ``coefs`` are designed with :func:`make_erb_filters` at its own rate, for
+    channels ``lo`` to ``hi``.
+    """
+    centre_freqs = np.asarray(centre_freqs, dtype=np.float64)
+
+    # The bandwidth is recovered from the pole radius of the full rate design,
+    # since B2 = exp(-2 * B * T) and B = 2 * pi * 1.019 * ERB
+    full_rate = make_erb_filters(fs, centre_freqs, width)
+    erb = -np.log(full_rate[:, 8]) * fs / (4 * np.pi * 1.019)
+    upper = centre_freqs + margin * erb
+
+    octaves = np.floor(np.log2(MULTIRATE_MAX_FRACTION * fs / upper))
+    octaves = np.maximum(octaves, 0)
+    if max_decimation is not None:
+        octaves = np.minimum(octaves, np.floor(np.log2(max_decimation)))
+    decimations = (2 ** octaves).astype(int)
+
+    bands = []
+    lo = 0
+    for hi in range(1, len(decimations) + 1):
+        if hi == len(decimations) or decimations[hi] != decimations[lo]:
+            decimation = int(decimations[lo])
+            band_fs = fs / decimation
+            bands.append(MultirateBand(
+                decimation,
+                band_fs,
+                lo,
+                hi,
+                make_erb_filters(band_fs, centre_freqs[lo:hi], width)
+            ))
+            lo = hi
+
+    return bands
+
+
+def erb_filterbank_multirate(wave, bands, dtype=np.float64, workers=None):
+    """
+    :param wave: input data, as for :func:`erb_filterbank`
+    :param bands: the output of :func:`multirate_bands`
+    :param dtype: the floating point type used for filtering and the outputs
+    :param workers: the number of threads to filter with
+    :return: a list with the filterbank output of each band, at that band's
+      sample rate
+
+    Process an input waveform with a gammatone filter bank, running each band
+    of channels at its own decimated rate. The input is decimated by two once
+    per octave, each stage starting from the previous one, using
+    :func:`scipy.signal.resample_poly` (a linear phase anti-alias filter with
+    its delay compensated, so that the bands stay aligned in time).
+    """
+    wave = np.asarray(wave, dtype=dtype)
+    decimated = {1: wave}
+    outputs = []
+
+    for band in bands:
+        factor = max(decimated)
+        while factor < band.decimation:
+            decimated[2 * factor] = sgn.resample_poly(
+                decimated[factor], 1, 2, axis=-1
+            ).astype(dtype, copy=False)
+            factor *= 2
+
+        outputs.append(erb_filterbank(
+            decimated[band.decimation],
+            band.coefs,
+            dtype=dtype,
+            workers=workers
+        ))
+
+    return outputs
+
+
+class GammatoneFilterbank:
+    """
+    A gammatone filterbank that keeps its filter state between calls, so that a
+    signal can be processed in consecutive blocks (eg. from a live capture, or
+    a recording too long to hold in memory).
+
+    Concatenating the outputs of :meth:`process` along the time axis gives the
+    same result as a single call to :func:`erb_filterbank` on the whole signal.
+    Only the state of each channel's four second order sections is kept between
+    blocks, so memory use depends on the block size and number of channels, not
+    on the total length of the signal.
+
+    A batch of signals can be streamed together by giving their ``batch_shape``
+    (eg. ``(n_signals,)``). Blocks then have shape ``batch_shape + (samples,)``
+    and outputs ``batch_shape + (channels, samples)``, as for
+    :func:`erb_filterbank`.
+    """
+
+    def __init__(
+            self,
+            coefs,
+            dtype=np.float64,
+            workers=None,
+            batch_shape=(),
+            backend=None,
+        ):
+        """
+        :param coefs: gammatone filter coefficients, as designed by
+          :func:`make_erb_filters`
+        :param dtype: the floating point type used for filtering, the filter
+          state and the output (see :func:`erb_filterbank`)
+        :param workers: the number of threads to filter with (see
+          :func:`erb_filterbank`)
+        :param batch_shape: the shape of the leading (non-time) axes of the
+          blocks, for streaming several signals at once
+        :param backend: the filter implementation (see :func:`erb_filterbank`)
+        """
+        self.dtype = np.dtype(dtype)
+        self.workers = workers
+        self.backend = _backend(backend)
+        self.batch_shape = tuple(batch_shape)
+        self.sos = erb_sos(coefs).astype(self.dtype)
+        self.reset()
+
+    @property
+    def channels(self):
+        """ The number of channels in the filterbank """
+        return self.sos.shape[0]
+
+    def reset(self):
+        """ Resets the filter state to zero, as for the start of a signal """
+        self._zi = np.zeros(
+            (self.channels, self.sos.shape[1]) + self.batch_shape + (2,),
+            dtype=self.dtype
+        )
+
+    def get_state(self):
+        """
+        Returns a copy of the current filter state, with shape
+        ``(channels, 4) + batch_shape + (2,)``. This can later be passed to
+        :meth:`set_state` to resume processing from the same point.
+        """
+        return self._zi.copy()
+
+    def set_state(self, state):
+        """
+        Restores a filter state previously returned by :meth:`get_state`.
+        """
+        state = np.array(state, dtype=self.dtype)
+
+        if state.shape != self._zi.shape:
+            raise ValueError(
+                "Filter state must have shape {}, not {}".format(
+                    self._zi.shape, state.shape
+            ))
+
+        self._zi = state
+
+    def process(self, block):
+        """
+        Filters the next ``block`` of the signal (a one dimensional sequence,
+        unless a ``batch_shape`` was given) and returns the filter outputs, one
+        channel per row.
+        """
+        block = np.asarray(block, dtype=self.dtype)
+
+        if block.shape[:-1] != self.batch_shape:
+            raise ValueError(
+                "Blocks must have shape {} + (samples,), not {}".format(
+                    self.batch_shape, block.shape
+            ))
+
+        output = np.empty(
+            self.batch_shape + (self.channels, block.shape[-1]),
+            dtype=self.dtype
+        )
+
+        _filter_channels(
+            self.sos, block, output, self._zi, self.workers, self.backend
+        )
+        return output
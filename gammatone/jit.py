@@ -0,0 +1,107 @@
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+This module contains a compiled filter kernel for the ``'numba'`` backend of
+:func:`gammatone.filters.erb_filterbank`. It requires `numba
+<https://numba.pydata.org/>`_, which is an optional dependency: importing this
+module raises :class:`ImportError` if numba is not installed, and the
+filterbank then falls back to :func:`scipy.signal.sosfilt`.
+"""
+from __future__ import division
+
+import numba
+import numpy as np
+
+
+@numba.njit(nogil=True, cache=True)
+def _sos_cascade(sos, wave, output, zi):
+    """
+    Runs every channel's cascade of second order sections over every signal.
+
+    :param sos: the sections, with shape ``(channels, sections, 6)``
+    :param wave: the input signals, with shape ``(signals, samples)``
+    :param output: the output array, with shape
+      ``(signals, channels, samples)``
+    :param zi: the filter state, with shape ``(channels, sections, signals, 2)``
+      (updated in place)
+    """
+    signals, samples = wave.shape
+    channels, sections = sos.shape[0], sos.shape[1]
+
+    for job in range(signals * channels):
+        sig = job // channels
+        chan = job % channels
+
+        # The state of the whole cascade is held in local variables, and each
+        # sample passes through all of the sections before the next is read.
+        # The arithmetic is the same as scipy's sosfilt (transposed direct
+        # form II), so the results agree exactly.
+        state = np.empty((sections, 2), dtype=zi.dtype)
+        for sec in range(sections):
+            state[sec, 0] = zi[chan, sec, sig, 0]
+            state[sec, 1] = zi[chan, sec, sig, 1]
+
+        for idx in range(samples):
+            x_cur = wave[sig, idx]
+            for sec in range(sections):
+                x_new = sos[chan, sec, 0] * x_cur + state[sec, 0]
+                state[sec, 0] = (
+                    sos[chan, sec, 1] * x_cur
+                    - sos[chan, sec, 4] * x_new
+                    + state[sec, 1]
+                )
+                state[sec, 1] = (
+                    sos[chan, sec, 2] * x_cur
+                    - sos[chan, sec, 5] * x_new
+                )
+                x_cur = x_new
+            output[sig, chan, idx] = x_cur
+
+        for sec in range(sections):
+            zi[chan, sec, sig, 0] = state[sec, 0]
+            zi[chan, sec, sig, 1] = state[sec, 1]
+
+
+def sos_cascade(sos, wave, output, zi=None):
+    """
+    Filters ``wave`` with each channel's cascade in ``sos``, writing into
+    ``output[..., channel, :]``. The arguments are as for
+    :func:`gammatone.filters.erb_filterbank` (``sos`` is the result of
+    :func:`gammatone.filters.erb_sos`), and ``zi``, if given, is the filter
+    state with shape ``(channels, 4) + wave.shape[:-1] + (2,)``, which is
+    updated in place.
+
+    The kernel releases the GIL, so groups of channels can be filtered on
+    separate threads, as :func:`gammatone.filters.erb_filterbank` does for
+    ``workers``.
+    """
+    batch_shape = wave.shape[:-1]
+    samples = wave.shape[-1]
+    channels, sections = sos.shape[:2]
+    signals = int(np.prod(batch_shape, dtype=int))
+
+    wave_2d = np.ascontiguousarray(wave).reshape(signals, samples)
+
+    if zi is None:
+        state = np.zeros((channels, sections, signals, 2), dtype=output.dtype)
+    elif zi.flags.c_contiguous:
+        state = zi.reshape(channels, sections, signals, 2)
+    else:
+        state = np.ascontiguousarray(zi).reshape(
+            channels, sections, signals, 2
+        )
+
+    if output.flags.c_contiguous:
+        out_3d = output.reshape(signals, channels, samples)
+    else:
+        out_3d = np.empty((signals, channels, samples), dtype=output.dtype)
+
+    _sos_cascade(sos, wave_2d, out_3d, state)
+
+    if not output.flags.c_contiguous:
+        output[...] = out_3d.reshape(output.shape)
+
+    if zi is not None and not zi.flags.c_contiguous:
+        zi[...] = state.reshape(zi.shape)
@@ -0,0 +1,143 @@
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+"""
+This module contains :class:`GammatonegramPlan`, which prepares everything that
+depends only on the analysis parameters (filter coefficients, window lengths,
+FFT weights) once, so that analysing many short signals with the same
+parameters only costs the signal processing itself.
+"""
+from __future__ import division
+
+import numpy as np
+
+from .cache import output_array, workspace_array
+from .fftweight import (
+    fft_gtgram_nfft, fft_gtgram_weights, specgram_window, _fft_gtgram
+)
+from .filters import erb_sos, _filter_channels
+from .gtgram import gtgram_coefs, gtgram_strides, integrate_windows
+
+METHODS = ('gtgram', 'fft_gtgram')
+
+
+class GammatonegramPlan:
+    """
+    A gammatonegram calculation for a fixed set of parameters, in the spirit of
+    an FFTW plan. Calling the plan with a signal gives the same result as
+    :func:`gammatone.gtgram.gtgram` (for ``method='gtgram'``) or
+    :func:`gammatone.fftweight.fft_gtgram` (for ``method='fft_gtgram'``) with
+    the same parameters::
+
+        plan = GammatonegramPlan(44100, 0.025, 0.01, 64, 50)
+        for clip in clips:
+            result = plan(clip)
+
+    Plans are cheap to pickle, eg. to send to the workers of a process pool:
+    only the parameters are pickled, and the plan is rebuilt when it is
+    unpickled.
+    """
+
+    def __init__(
+            self,
+            fs,
+            window_time, hop_time,
+            channels,
+            f_min,
+            method='gtgram',
+            dtype=np.float64,
+            workers=None,
+        ):
+        """
+        :param method: ``'gtgram'`` for the gammatone filterbank, or
+          ``'fft_gtgram'`` for the FFT based approximation
+
+        The other parameters are as for :func:`gammatone.gtgram.gtgram`.
+        """
+        if method not in METHODS:
+            raise ValueError(
+                "Unknown gammatonegram method {!r}, must be one of {}".format(
+                    method, ", ".join(METHODS)
+            ))
+
+        self.fs = fs
+        self.window_time = window_time
+        self.hop_time = hop_time
+        self.channels = channels
+        self.f_min = f_min
+        self.method = method
+        self.dtype = np.dtype(dtype)
+        self.workers = workers
+
+        self.nwin, self.hop_samples, _ = gtgram_strides(
+            fs, window_time, hop_time, 0
+        )
+
+        if method == 'gtgram':
+            self.sos = erb_sos(gtgram_coefs(fs, channels, f_min)).astype(
+                self.dtype
+            )
+        else:
+            self.nfft = fft_gtgram_nfft(fs, window_time)
+            self.window = specgram_window(self.nfft, self.nwin).astype(
+                self.dtype
+            )
+            # The width of 1 is fixed, as in fft_gtgram
+            self.weights = fft_gtgram_weights(
+                self.nfft, fs, channels, 1, f_min, self.dtype
+            )
+
+    def __reduce__(self):
+        return (
+            self.__class__,
+            (
+                self.fs,
+                self.window_time, self.hop_time,
+                self.channels,
+                self.f_min,
+                self.method,
+                self.dtype,
+                self.workers,
+            )
+        )
+
+    def columns(self, length):
+        """
+        Returns the number of columns in the result for a signal of ``length``
+        samples, which is zero if the signal is shorter than one window
+        """
+        if self.method == 'gtgram':
+            return max(0, 1 + (length - self.nwin) // self.hop_samples)
+        return max(0, 1 + (length - self.nfft) // self.hop_samples)
+
+    def __call__(self, wave, out=None, workspace=None):
+        """
+        Calculates the gammatonegram of ``wave``. ``out`` and ``workspace`` are
+        as for :func:`gammatone.gtgram.gtgram`.
+        """
+        wave = np.asarray(wave, dtype=self.dtype)
+
+        if self.method == 'fft_gtgram':
+            return _fft_gtgram(
+                wave, self.window, self.hop_samples, self.weights,
+                out, workspace
+            )
+
+        xe = workspace_array(
+            workspace,
+            'gtgram_xe',
+            wave.shape[:-1] + (self.channels, wave.shape[-1]),
+            self.dtype
+        )
+        _filter_channels(self.sos, wave, xe, workers=self.workers)
+        np.square(xe, out=xe)
+
+        y = output_array(
+            out,
+            wave.shape[:-1] + (self.channels, self.columns(wave.shape[-1])),
+            self.dtype
+        )
+        integrate_windows(xe, self.nwin, self.hop_samples, y)
+
+        return y
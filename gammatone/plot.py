@@ -8,6 +8,7 @@ Plotting utilities related to gammatone analysis, primarily for use with
 """
 from __future__ import division
 import argparse
+import functools
 import os.path
 
 import matplotlib.pyplot
@@ -164,6 +165,17 @@ def main():
              " is more accurate."
         )
 
+    parser.add_argument(
+        '-j', '--workers', type=int, default=None,
+        help="The number of threads to use for the full filterbank approach "
+             "(--accurate), or -1 for one per CPU (default is one thread)."
+        )
+
     args = parser.parse_args()
 
-    return render_audio_from_file(args.sound_file, args.duration, args.function)
+    function = args.function
+
+    if function is gammatone.gtgram.gtgram:
+        function = functools.partial(function, workers=args.workers)
+
+    return render_audio_from_file(args.sound_file, args.duration, function)
@@ -2,11 +2,26 @@
 #
 # This file is part of the gammatone toolkit, and is licensed under the 3-clause
 # BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import os
+import re
+
 from setuptools import setup, find_packages
 
+
+def read_version():
+    """ Reads __version__ from the package without importing it """
+    init_path = os.path.join(
+        os.path.dirname(__file__), 'gammatone', '__init__.py'
+    )
+    with open(init_path) as init_file:
+        return re.search(
+            r"^__version__ = '([^']+)'", init_file.read(), re.MULTILINE
+        ).group(1)
+
+
 setup(
     name = "Gammatone",
-    version = "1.0",
+    version = read_version(),
     packages = find_packages(),
 
     install_requires = [
@@ -17,6 +32,10 @@ setup(
         'matplotlib',
     ],
 
+    extras_require = {
+        'numba': ['numba'],
+    },
+
     entry_points = {
         'console_scripts': [
             'gammatone = gammatone.plot:main',
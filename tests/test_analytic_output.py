@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+import scipy.signal as sgn
+
+import gammatone.filters
+
+CHANNELS = 16
+
+# (fs, f_min)
+DESIGNS = (
+    (16000, 100),
+    (44100, 50),
+)
+
+
+def make_coefs(fs, f_min):
+    cfs = gammatone.filters.centre_freqs(fs, CHANNELS, f_min)
+    return gammatone.filters.make_erb_filters(fs, cfs)
+
+
+def test_analytic_envelope():
+    for fs, f_min in DESIGNS:
+        yield AnalyticEnvelopeTester(fs, f_min)
+
+
+class AnalyticEnvelopeTester:
+
+    def __init__(self, fs, f_min):
+        self.fs = fs
+        self.f_min = f_min
+        self.description = (
+            "Analytic output envelope for fs = {:d}, f_min = {:d}"
+            .format(fs, f_min)
+        )
+
+    def __call__(self):
+        coefs = make_coefs(self.fs, self.f_min)
+        signal = np.random.RandomState(8).randn(self.fs)
+
+        analytic = gammatone.filters.erb_filterbank(
+            signal, coefs, output='analytic'
+        )
+        real = gammatone.filters.erb_filterbank(signal, coefs)
+        envelope = np.abs(sgn.hilbert(real, axis=-1))
+
+        # Skip the start-up transient and the end, where the FFT based Hilbert
+        # transform wraps around. The top and bottom channels are close to the
+        # Nyquist frequency and DC, where the real filter isn't a good match.
+        part = slice(self.fs // 8, -self.fs // 8)
+        analytic = analytic[1:-1, part]
+        envelope = envelope[1:-1, part]
+
+        error = np.sqrt(np.mean((np.abs(analytic) - envelope) ** 2, axis=-1))
+        rms = np.sqrt(np.mean(envelope ** 2, axis=-1))
+        assert analytic.dtype == np.complex128
+        assert np.all(error < 0.01 * rms)
+
+
+def test_analytic_response():
+    fs = 16000
+    coefs = make_coefs(fs, 100)
+    freqs = np.linspace(20, fs / 2 - 20, 4000)
+
+    sos = gammatone.filters.erb_analytic_sos(coefs)
+    zinv = np.exp(-2j * np.pi * freqs / fs)
+    response = np.prod(
+        sos[:, :, 0, None] / (1 + sos[:, :, 4, None] * zinv), axis=1
+    )
+
+    real = np.abs(
+        gammatone.filters.erb_frequency_response(coefs, fs, freqs)
+    )
+
+    # Compare within 20 dB of the peak, away from the top and bottom channels
+    passband = real[1:-1] > 0.1
+    difference = 20 * np.log10(np.abs(response[1:-1]) / 2 / real[1:-1])
+    assert np.abs(difference[passband]).max() < 0.1
+
+
+def test_analytic_precision():
+    coefs = make_coefs(16000, 100)
+    signal = np.random.RandomState(9).randn(2, 4000)
+
+    double = gammatone.filters.erb_filterbank(
+        signal, coefs, output='analytic'
+    )
+    single = gammatone.filters.erb_filterbank(
+        signal, coefs, output='analytic', dtype=np.float32
+    )
+
+    assert double.shape == (2, CHANNELS, 4000)
+    assert single.dtype == np.complex64
+    assert np.abs(single - double).max() < 5e-4 * np.abs(double).max()
+
+
+def test_analytic_fir_engine():
+    with nose.tools.assert_raises(ValueError):
+        gammatone.filters.erb_filterbank(
+            np.zeros(10), make_coefs(16000, 100), output='analytic',
+            engine='fir'
+        )
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.fftweight
+
+FS = 16000
+
+# (nfft, channels, f_min)
+WEIGHT_PARAMS = (
+    (512, 16, 50),
+    (2048, 100, 20),
+)
+
+THRESHOLDS = (0, 1e-4, 1e-2, 0.5)
+
+
+def test_banded_weights():
+    for params in WEIGHT_PARAMS:
+        for threshold in THRESHOLDS:
+            yield BandedWeightsTester(params, threshold)
+
+
+class BandedWeightsTester:
+
+    def __init__(self, params, threshold):
+        self.params = params
+        self.threshold = threshold
+        self.description = (
+            "Banded weights for (nfft, channels, f_min) = {}, threshold {:g}"
+            .format(params, threshold)
+        )
+
+    def __call__(self):
+        nfft, channels, f_min = self.params
+        weights = gammatone.fftweight.fft_gtgram_weights(
+            nfft, FS, channels, 1, f_min
+        )
+        starts, stops = gammatone.fftweight.fft_gtgram_weight_bands(
+            nfft, FS, channels, 1, f_min, self.threshold
+        )
+        banded = gammatone.fftweight.BandedWeights(weights, starts, stops)
+
+        # Only weights below the threshold are dropped
+        dropped = weights - banded.toarray()
+        peaks = weights.max(axis=1)
+        assert np.all(dropped >= 0)
+        assert np.all(dropped < self.threshold * peaks[:, None] + 1e-300)
+
+        # The error of a product is within the documented bound
+        x = np.abs(np.random.RandomState(50).randn(weights.shape[1], 20))
+        expected = weights.dot(x)
+        result = banded.dot(x)
+        bound = self.threshold * peaks[:, None] * x.sum(axis=0)
+        assert np.all(result <= expected * (1 + 1e-12))
+        assert np.all(expected - result <= bound + 1e-12 * expected)
+
+
+def test_fft_gtgram_threshold():
+    signal = np.random.RandomState(51).randn(FS // 2)
+    params = (0.025, 0.01, 64, 50)
+
+    for dtype in (np.float64, np.float32):
+        expected = gammatone.fftweight.fft_gtgram(
+            signal, FS, *params, dtype=dtype
+        )
+        exact = gammatone.fftweight.fft_gtgram(
+            signal, FS, *params, dtype=dtype, weight_threshold=0
+        )
+        approx = gammatone.fftweight.fft_gtgram(
+            signal, FS, *params, dtype=dtype, weight_threshold=1e-3
+        )
+
+        assert approx.dtype == dtype
+        assert np.allclose(exact, expected, rtol=1e-5)
+        assert np.abs(approx - expected).max() <= 1e-3 * expected.max()
+
+
+def test_invalid_threshold():
+    weights = np.ones((4, 10))
+    for threshold in (-0.1, 1, 2):
+        with nose.tools.assert_raises(ValueError):
+            gammatone.fftweight.weight_bands(weights, threshold)
+
+
+if __name__ == '__main__':
+    nose.main()
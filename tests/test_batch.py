@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import os
+import subprocess
+import sys
+import tempfile
+
+import nose
+import numpy as np
+import scipy.io.wavfile
+
+import gammatone.batch
+import gammatone.plan
+
+FS = 16000
+# Including a clip too short for a single column
+LENGTHS = (3000, 8000, 1700, 100, 5000, 4100, 12000, 2500)
+
+
+def make_plan(method='gtgram'):
+    return gammatone.plan.GammatonegramPlan(
+        FS, 0.025, 0.01, 8, 100, method=method
+    )
+
+
+def make_clips():
+    rng = np.random.RandomState(18)
+    return [rng.randn(length) for length in LENGTHS]
+
+
+def test_batch():
+    for method in gammatone.plan.METHODS:
+        for ordered in (True, False):
+            yield BatchTester(method, ordered)
+
+
+class BatchTester:
+
+    def __init__(self, method, ordered):
+        self.method = method
+        self.ordered = ordered
+        self.description = "Batch {} with ordered = {}".format(method, ordered)
+
+    def __call__(self):
+        plan = make_plan(self.method)
+        clips = make_clips()
+        stats = gammatone.batch.BatchStats()
+
+        results = list(gammatone.batch.analyse_batch(
+            clips, plan, workers=2, max_pending=3, ordered=self.ordered,
+            stats=stats
+        ))
+
+        indices = [index for index, _ in results]
+        if self.ordered:
+            assert indices == list(range(len(clips)))
+        else:
+            assert sorted(indices) == list(range(len(clips)))
+
+        for index, result in results:
+            assert np.array_equal(result, plan(clips[index]))
+
+        assert stats.clips == len(clips)
+        assert stats.samples == sum(LENGTHS)
+        assert stats.realtime_factor > 0
+
+
+def test_batch_bounded():
+    clips = make_clips()
+    taken = []
+
+    def lazy_clips():
+        for clip in clips:
+            taken.append(clip)
+            yield clip
+
+    results = gammatone.batch.analyse_batch(
+        lazy_clips(), make_plan(), workers=2, max_pending=2
+    )
+
+    for returned, _ in enumerate(results, 1):
+        # The returned clip, plus at most two more in flight
+        assert len(taken) <= returned + 2
+
+
+def test_batch_files():
+    plan = make_plan()
+    rng = np.random.RandomState(19)
+    clips = [rng.randn(4000), rng.randn(3000, 2)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for num, clip in enumerate(clips):
+            paths.append(os.path.join(directory, "{:d}.wav".format(num)))
+            scipy.io.wavfile.write(paths[-1], FS, clip.astype(np.float32))
+
+        results = list(gammatone.batch.analyse_batch(paths, plan, workers=2))
+
+        for (index, result), path in zip(results, paths):
+            expected = plan(gammatone.batch.read_clip(path))
+            assert np.array_equal(result, expected)
+
+        scipy.io.wavfile.write(paths[0], FS // 2, clips[0])
+        with nose.tools.assert_raises(ValueError):
+            list(gammatone.batch.analyse_batch(paths[:1], plan, workers=1))
+
+
+def test_batch_without_matplotlib():
+    code = "import sys, gammatone.batch; print('matplotlib' in sys.modules)"
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.strip() == b"False"
+
+
+if __name__ == '__main__':
+    nose.main()
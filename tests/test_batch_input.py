@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.filters
+import gammatone.gtgram
+
+FS = 8000
+CHANNELS = 12
+F_MIN = 50
+
+
+def make_signals(n_signals=3, length=2400):
+    return np.random.RandomState(1).randn(n_signals, length)
+
+
+def test_erb_filterbank_batch():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    coefs = gammatone.filters.make_erb_filters(FS, cfs)
+    signals = make_signals()
+
+    result = gammatone.filters.erb_filterbank(signals, coefs)
+    expected = np.stack([
+        gammatone.filters.erb_filterbank(sig, coefs) for sig in signals
+    ])
+
+    assert result.shape == (signals.shape[0], CHANNELS, signals.shape[1])
+    assert np.allclose(result, expected, rtol=1e-12, atol=1e-15)
+
+
+def test_gtgram_batch():
+    signals = make_signals()
+    args = (FS, 0.025, 0.01, CHANNELS, F_MIN)
+
+    result = gammatone.gtgram.gtgram(signals, *args)
+    expected = np.stack([
+        gammatone.gtgram.gtgram(sig, *args) for sig in signals
+    ])
+
+    assert result.shape == expected.shape
+    assert result.shape[:2] == (signals.shape[0], CHANNELS)
+    assert np.allclose(result, expected, rtol=1e-12, atol=1e-15)
+
+
+if __name__ == '__main__':
+    nose.main()
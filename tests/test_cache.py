@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.cache
+import gammatone.fftweight
+import gammatone.gtgram
+
+
+def test_hits_and_misses():
+    cache = gammatone.cache.ArrayCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(10.0)
+
+    first = cache.get(('a', 1), compute)
+    second = cache.get(('a', np.float64(1.0)), compute)
+
+    assert first is second
+    assert len(calls) == 1
+
+    info = cache.info()
+    assert (info.hits, info.misses, info.entries) == (1, 1, 1)
+    assert info.nbytes == first.nbytes
+
+
+def test_read_only():
+    cache = gammatone.cache.ArrayCache()
+    weights, gains = cache.get(('b',), lambda: (np.ones(4), np.zeros(2)))
+
+    with nose.tools.assert_raises(ValueError):
+        weights[0] = 2
+
+    with nose.tools.assert_raises(ValueError):
+        gains[0] = 2
+
+
+def test_size_bound_evicts_least_recently_used():
+    item_bytes = np.zeros(100).nbytes
+    cache = gammatone.cache.ArrayCache(max_bytes=2 * item_bytes)
+
+    cache.get(('x',), lambda: np.zeros(100))
+    cache.get(('y',), lambda: np.zeros(100))
+    cache.get(('x',), lambda: np.zeros(100))
+    cache.get(('z',), lambda: np.zeros(100))
+
+    # 'y' was the least recently used entry
+    info = cache.info()
+    assert info.entries == 2
+    assert info.nbytes == 2 * item_bytes
+
+    cache.get(('y',), lambda: np.zeros(100))
+    assert cache.info().misses == 4
+
+
+def test_too_big_not_stored():
+    cache = gammatone.cache.ArrayCache(max_bytes=10)
+    result = cache.get(('big',), lambda: np.zeros(100))
+    assert result.shape == (100,)
+    assert cache.info().entries == 0
+
+
+def test_resize_and_clear():
+    item_bytes = np.zeros(100).nbytes
+    cache = gammatone.cache.ArrayCache(max_bytes=4 * item_bytes)
+
+    for name in 'abcd':
+        cache.get((name,), lambda: np.zeros(100))
+
+    cache.resize(item_bytes)
+    info = cache.info()
+    assert info.entries == 1
+    assert info.max_bytes == item_bytes
+
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 0, item_bytes)
+
+
+def test_analysis_uses_shared_cache():
+    cache = gammatone.cache.coefficient_cache
+    cache.clear()
+
+    signal = np.random.RandomState(2).randn(4000)
+    args = (8000, 0.025, 0.01, 8, 100)
+
+    for _ in range(2):
+        gammatone.gtgram.gtgram(signal, *args)
+        gammatone.fftweight.fft_gtgram(signal, *args)
+
+    info = cache.info()
+    assert info.misses == 2
+    assert info.hits == 2
+
+
+def test_single_precision_weights_cached():
+    cache = gammatone.cache.coefficient_cache
+    cache.clear()
+    args = (1024, 16000, 64, 1, 50)
+
+    single = gammatone.fftweight.fft_gtgram_weights(*args, dtype=np.float32)
+    # Both the double precision design and its single precision copy are
+    # cached, and later single precision calls reuse the copy
+    assert cache.info().misses == 2
+    assert single.dtype == np.float32
+    assert gammatone.fftweight.fft_gtgram_weights(
+        *args, dtype=np.float32
+    ) is single
+    assert np.array_equal(
+        single,
+        gammatone.fftweight.fft_gtgram_weights(*args).astype(np.float32)
+    )
+
+
+if __name__ == '__main__':
+    nose.main()
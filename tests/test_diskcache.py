@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import os
+import shutil
+import tempfile
+import time
+
+from mock import patch
+import nose
+import numpy as np
+
+import gammatone.diskcache
+import gammatone.fftweight
+import gammatone.gtgram
+
+FS = 16000
+
+# (window_time, hop_time, channels, f_min)
+PARAMS = (0.025, 0.01, 16, 50)
+
+FUNCTIONS = (
+    gammatone.gtgram.gtgram,
+    gammatone.fftweight.fft_gtgram,
+)
+
+
+class TempCache:
+    """ A DiskCache in a temporary directory that is removed on exit """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def __enter__(self):
+        self.path = tempfile.mkdtemp()
+        return gammatone.diskcache.DiskCache(self.path, **self.kwargs)
+
+    def __exit__(self, *exc_info):
+        shutil.rmtree(self.path)
+
+
+def test_cached_results():
+    for function in FUNCTIONS:
+        yield CachedResultTester(function)
+
+
+class CachedResultTester:
+
+    def __init__(self, function):
+        self.function = function
+        self.description = "Disk cached results for {}".format(
+            function.__name__
+        )
+
+    def __call__(self):
+        signal = np.random.RandomState(30).randn(FS // 4)
+        expected = self.function(signal, FS, *PARAMS)
+
+        with TempCache() as cache:
+            first = self.function(signal, FS, *PARAMS, cache=cache)
+            second = self.function(signal, FS, *PARAMS, cache=cache)
+
+            assert np.array_equal(first, expected)
+            assert np.array_equal(second, expected)
+            assert isinstance(second, np.memmap)
+
+            info = cache.info()
+            assert (info.hits, info.misses, info.entries) == (1, 1, 1)
+            assert info.bytes_saved == expected.nbytes
+
+            # Into an output array
+            out = np.empty_like(expected)
+            result = self.function(signal, FS, *PARAMS, out=out, cache=cache)
+            assert result is out
+            assert np.array_equal(out, expected)
+
+
+def test_keys():
+    signal = np.random.RandomState(31).randn(FS // 4)
+    changed = signal.copy()
+    changed[100] += 1e-9
+
+    with TempCache() as cache:
+        gammatone.gtgram.gtgram(signal, FS, *PARAMS, cache=cache)
+        # Different signals, parameters and dtypes are different entries
+        gammatone.gtgram.gtgram(changed, FS, *PARAMS, cache=cache)
+        gammatone.gtgram.gtgram(signal, FS, 0.02, 0.01, 16, 50, cache=cache)
+        gammatone.gtgram.gtgram(
+            signal, FS, *PARAMS, dtype=np.float32, cache=cache
+        )
+        gammatone.fftweight.fft_gtgram(signal, FS, *PARAMS, cache=cache)
+        assert cache.info().misses == 5
+
+        # The block size doesn't change the result, and a numpy sample rate is
+        # the same as a Python one
+        gammatone.gtgram.gtgram(
+            signal, np.float64(FS), *PARAMS, block_size=1000, cache=cache
+        )
+        assert cache.info().hits == 1
+
+
+def test_eviction():
+    with TempCache() as cache:
+        for seed in range(3):
+            cache.store(('entry', seed), np.zeros(1000))
+
+        entry_bytes = cache.info().nbytes // 3
+
+        # Make entry 0 the most recently used
+        for seed in range(3):
+            digest = gammatone.diskcache._digest(('entry', seed))
+            os.utime(cache._entry_path(digest), (seed, seed))
+        assert cache.load(('entry', 0)) is not None
+
+        cache.resize(2 * entry_bytes)
+        assert cache.info().entries == 2
+        assert cache.load(('entry', 1)) is None
+        assert cache.load(('entry', 0)) is not None
+        assert cache.load(('entry', 2)) is not None
+
+        # No temporary files are left behind
+        assert all(name.endswith('.npy') for name in os.listdir(cache.path))
+
+        cache.clear()
+        info = cache.info()
+        assert (info.hits, info.misses, info.entries) == (0, 0, 0)
+
+
+def test_orphaned_temporary_files():
+    with TempCache() as cache:
+        old_path = os.path.join(cache.path, 'crashed.tmp')
+        new_path = os.path.join(cache.path, 'writing.tmp')
+        for path in (old_path, new_path):
+            with open(path, 'wb'):
+                pass
+
+        age = gammatone.diskcache.TEMP_MAX_AGE + 60
+        os.utime(old_path, (time.time() - age,) * 2)
+
+        # Old temporary files are removed, but not ones still being written
+        cache.store(('entry',), np.zeros(10))
+        assert not os.path.exists(old_path)
+        assert os.path.exists(new_path)
+
+        os.utime(new_path, (time.time() - age,) * 2)
+        cache.clear()
+        assert os.listdir(cache.path) == []
+
+
+def test_version_in_keys():
+    key = ('entry', 1)
+    digest = gammatone.diskcache._digest(key)
+
+    with patch('gammatone.diskcache.__version__', 'other'):
+        assert gammatone.diskcache._digest(key) != digest
+
+
+def test_shared_directory():
+    # Two caches on the same directory, as in separate worker processes
+    with TempCache() as cache:
+        other = gammatone.diskcache.DiskCache(cache.path)
+        cache.store(('shared',), np.arange(10.0))
+        assert np.array_equal(other.load(('shared',)), np.arange(10.0))
+
+
+if __name__ == '__main__':
+    nose.main()
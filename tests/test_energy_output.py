@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+import scipy.signal as sgn
+
+import gammatone.filters
+import gammatone.gtgram
+
+FS = 16000
+CHANNELS = 8
+F_MIN = 100
+
+# (decimation, signal shape)
+CASES = (
+    (1, (20001,)),
+    (7, (20001,)),
+    (80, (2, 20000)),
+    (160, (2, 3, 9999)),
+    (10000, (20001,)),
+)
+
+
+def test_energy_output():
+    for decimation, shape in CASES:
+        yield EnergyOutputTester(decimation, shape)
+
+
+class EnergyOutputTester:
+
+    def __init__(self, decimation, shape):
+        self.decimation = decimation
+        self.shape = shape
+        self.description = (
+            "Energy output for decimation = {:d}, shape = {}"
+            .format(decimation, shape)
+        )
+
+    def __call__(self):
+        coefs = gammatone.filters.make_erb_filters(
+            FS, gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+        )
+        wave = np.random.RandomState(12).randn(*self.shape)
+
+        energy = gammatone.filters.erb_filterbank(wave, coefs) ** 2
+        if self.decimation > 1:
+            smoothing = sgn.butter(
+                gammatone.filters.ENERGY_FILTER_ORDER,
+                gammatone.filters.ENERGY_FILTER_CUTOFF / self.decimation,
+                output='sos'
+            )
+            energy = sgn.sosfilt(smoothing, energy, axis=-1)
+        expected = energy[..., ::self.decimation]
+
+        result = gammatone.filters.erb_filterbank(
+            wave, coefs, output='energy', decimation=self.decimation
+        )
+
+        assert result.shape == self.shape[:-1] + (
+            CHANNELS, -(-self.shape[-1] // self.decimation)
+        )
+        assert np.allclose(result, expected, rtol=1e-10, atol=1e-14)
+
+
+def test_gtgram_xe_decimation():
+    wave = np.random.RandomState(13).randn(8000)
+    xe = gammatone.gtgram.gtgram_xe(wave, FS, CHANNELS, F_MIN)
+    decimated = gammatone.gtgram.gtgram_xe(
+        wave, FS, CHANNELS, F_MIN, decimation=40
+    )
+
+    assert decimated.shape == (CHANNELS, 200)
+    # The smoothing filter has unity gain at DC, so the mean energy is kept
+    assert np.allclose(decimated.mean(-1), xe.mean(-1), rtol=0.05)
+
+
+def test_energy_output_errors():
+    coefs = gammatone.filters.make_erb_filters(
+        FS, gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    )
+    wave = np.zeros(100)
+
+    for kwargs in (
+            dict(output='power'),
+            dict(output='energy', engine='fir'),
+            dict(output='energy', decimation=0),
+        ):
+        nose.tools.assert_raises(
+            ValueError,
+            gammatone.filters.erb_filterbank, wave, coefs, **kwargs
+        )
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+from mock import patch
+import nose
+import numpy as np
+
+import gammatone.fftweight
+
+FS = 16000
+
+# (window_time, hop_time, channels, f_min)
+PARAMS = (
+    (0.025, 0.01, 16, 50),
+    (0.02, 0.03, 8, 100),
+    (0.0253, 0.0111, 8, 80),
+)
+
+# Upper limits for random chunk sizes
+MAX_CHUNKS = (1, 50, 700, 20000)
+
+
+def random_chunks(signal, max_chunk, seed):
+    """ Splits ``signal`` into chunks of random sizes """
+    rng = np.random.RandomState(seed)
+    start = 0
+    while start < signal.shape[-1]:
+        size = rng.randint(0, max_chunk + 1)
+        yield signal[start:start + size]
+        start += size
+
+
+def test_fft_gtgram_stream():
+    for params in PARAMS:
+        for max_chunk in MAX_CHUNKS:
+            yield FFTGtgramStreamTester(params, max_chunk)
+
+
+class FFTGtgramStreamTester:
+
+    def __init__(self, params, max_chunk):
+        self.params = params
+        self.max_chunk = max_chunk
+        self.description = (
+            "Streaming fft_gtgram for {}, chunks of up to {:d} samples"
+            .format(params, max_chunk)
+        )
+
+    def __call__(self):
+        signal = np.random.RandomState(60).randn(FS // 2)
+        expected = gammatone.fftweight.fft_gtgram(signal, FS, *self.params)
+
+        stream = gammatone.fftweight.FFTGammatonegramStream(FS, *self.params)
+        result = np.concatenate(
+            [
+                stream.process(chunk)
+                for chunk in random_chunks(signal, self.max_chunk, 61)
+            ],
+            axis=-1
+        )
+
+        # The weights are applied to different numbers of frames at a time,
+        # so the results can differ by rounding
+        assert stream.columns == expected.shape[-1]
+        assert np.allclose(result, expected, rtol=1e-12, atol=0)
+
+
+def test_fft_gtgram_frames():
+    params = PARAMS[2]
+    signal = np.random.RandomState(62).randn(FS // 2)
+    expected = gammatone.fftweight.fft_gtgram(signal, FS, *params)
+
+    frames = list(gammatone.fftweight.fft_gtgram_frames(
+        random_chunks(signal, 300, 63), FS, *params, weight_threshold=0
+    ))
+
+    assert len(frames) == expected.shape[-1]
+    assert np.allclose(np.stack(frames, axis=-1), expected, rtol=1e-12)
+
+
+def test_fft_gtgram_blocks():
+    # The result doesn't depend on how the frames are split into blocks
+    params = PARAMS[0]
+    signal = np.random.RandomState(64).randn(FS // 2)
+    expected = gammatone.fftweight.fft_gtgram(signal, FS, *params)
+
+    for block_frames in (1, 3, 40):
+        with patch(
+                'gammatone.fftweight.SPECGRAM_BLOCK_SAMPLES',
+                block_frames * gammatone.fftweight.fft_gtgram_nfft(
+                    FS, params[0]
+                )):
+            result = gammatone.fftweight.fft_gtgram(signal, FS, *params)
+        assert np.allclose(result, expected, rtol=1e-12, atol=0)
+
+
+def test_fft_gtgram_short_signal():
+    # Signals shorter than one FFT frame have no columns
+    window_time, hop_time, channels, f_min = PARAMS[0]
+
+    for length in (900, 1000):
+        signal = np.random.RandomState(34).randn(length)
+        result = gammatone.fftweight.fft_gtgram(
+            signal, FS, window_time, hop_time, channels, f_min
+        )
+        assert result.shape == (channels, 0)
+
+
+def test_fft_gtgram_batch():
+    signals = np.random.RandomState(35).randn(3, 4000)
+    with nose.tools.assert_raises(ValueError):
+        gammatone.fftweight.fft_gtgram(signals, FS, *PARAMS[0])
+
+
+def test_stream_reset():
+    params = PARAMS[0]
+    signal = np.random.RandomState(65).randn(FS // 4)
+    stream = gammatone.fftweight.FFTGammatonegramStream(FS, *params)
+
+    first = stream.process(signal)
+    stream.reset()
+    second = stream.process(signal)
+
+    assert stream.columns == first.shape[-1]
+    assert np.array_equal(first, second)
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -62,5 +62,50 @@ class ERBFilterBankTester:
         assert np.allclose(result, self.expected, rtol=1e-5, atol=1e-12)
 
 
+def test_ERB_filterbank_single_precision():
+    for inputs, refs in load_reference_data():
+        args = (
+            inputs['wave'],
+            inputs['fcoefs'],
+        )
+
+        expected = (refs['filterbank'],)
+
+        yield ERBFilterBankSinglePrecisionTester(args, expected)
+
+
+class ERBFilterBankSinglePrecisionTester(ERBFilterBankTester):
+    """
+    Single precision filtering against the double precision reference data.
+    Errors are measured relative to the peak output of each case, since a
+    relative tolerance per sample is meaningless near zero crossings.
+    """
+
+    def __init__(self, args, expected):
+        super().__init__(args, expected)
+        self.description = "Single precision " + self.description.lower()
+
+    def __call__(self):
+        result = gammatone.filters.erb_filterbank(
+            self.signal, self.fcoefs, dtype=np.float32
+        )
+        assert result.dtype == np.float32
+        max_diff = np.max(np.abs(result - self.expected))
+        peak = np.max(np.abs(self.expected))
+        diagnostic = "Maximum relative difference: {:6e}".format(max_diff / peak)
+        assert max_diff <= 5e-4 * peak, diagnostic
+
+
+def test_ERB_filterbank_empty_signal():
+    cfs = gammatone.filters.centre_freqs(16000, 8, 50)
+    fcoefs = gammatone.filters.make_erb_filters(16000, cfs)
+
+    for backend in ('scipy', None):
+        result = gammatone.filters.erb_filterbank(
+            np.zeros(0), fcoefs, backend=backend
+        )
+        assert result.shape == (8, 0)
+
+
 if __name__ == '__main__':
     nose.main()
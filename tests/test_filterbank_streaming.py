@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.filters
+
+FS = 16000
+CHANNELS = 16
+F_MIN = 50
+BLOCK_SIZES = (1, 7, 64, 1000, 4096)
+
+
+def make_coefs():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    return gammatone.filters.make_erb_filters(FS, cfs)
+
+
+def make_signal(length=5000):
+    return np.random.RandomState(0).randn(length)
+
+
+def test_blocks_match_whole_signal():
+    for block_size in BLOCK_SIZES:
+        yield BlockStreamTester(block_size)
+
+
+class BlockStreamTester:
+
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self.description = (
+            "Streaming filterbank with block size {:d}".format(block_size)
+        )
+
+    def __call__(self):
+        coefs = make_coefs()
+        signal = make_signal()
+        expected = gammatone.filters.erb_filterbank(signal, coefs)
+
+        fbank = gammatone.filters.GammatoneFilterbank(coefs)
+        result = np.hstack([
+            fbank.process(signal[start:start + self.block_size])
+            for start in range(0, signal.shape[0], self.block_size)
+        ])
+
+        assert result.shape == expected.shape
+        assert np.allclose(result, expected, rtol=1e-10, atol=1e-14)
+
+
+def test_state_snapshot_and_restore():
+    coefs = make_coefs()
+    signal = make_signal()
+    fbank = gammatone.filters.GammatoneFilterbank(coefs)
+
+    fbank.process(signal[:2000])
+    state = fbank.get_state()
+    first = fbank.process(signal[2000:])
+
+    fbank.set_state(state)
+    second = fbank.process(signal[2000:])
+
+    assert np.array_equal(first, second)
+
+
+def test_reset():
+    coefs = make_coefs()
+    signal = make_signal()
+    fbank = gammatone.filters.GammatoneFilterbank(coefs)
+
+    fbank.process(signal)
+    fbank.reset()
+
+    assert np.array_equal(
+        fbank.process(signal),
+        gammatone.filters.erb_filterbank(signal, coefs)
+    )
+
+
+def test_empty_block():
+    coefs = make_coefs()
+    signal = make_signal()
+    fbank = gammatone.filters.GammatoneFilterbank(coefs, backend='scipy')
+
+    first = fbank.process(signal[:2000])
+    state = fbank.get_state()
+    empty = fbank.process(signal[:0])
+
+    assert empty.shape == (CHANNELS, 0)
+    assert np.array_equal(fbank.get_state(), state)
+    assert np.array_equal(
+        np.hstack([first, empty, fbank.process(signal[2000:])]),
+        gammatone.filters.erb_filterbank(signal, coefs, backend='scipy')
+    )
+
+
+def test_bad_state_shape():
+    fbank = gammatone.filters.GammatoneFilterbank(make_coefs())
+    with nose.tools.assert_raises(ValueError):
+        fbank.set_state(np.zeros((CHANNELS, 2)))
+
+
+if __name__ == '__main__':
+    nose.main()
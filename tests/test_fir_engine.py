@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.filters
+import gammatone.gtgram
+
+FS = 16000
+CHANNELS = 24
+F_MIN = 50
+
+
+def make_coefs():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    return gammatone.filters.make_erb_filters(FS, cfs)
+
+
+def max_relative_error(result, expected):
+    """ Maximum error relative to the peak of each channel """
+    error = np.abs(result - expected).max(axis=-1)
+    return np.max(error / np.abs(expected).max(axis=-1))
+
+
+def test_impulse_response_truncation():
+    coefs = make_coefs()
+    tolerance = 1e-8
+    responses = gammatone.filters.erb_impulse_responses(coefs, tolerance)
+
+    length = gammatone.filters.erb_decay_length(coefs, 1e-12).max()
+    impulse = np.zeros(length)
+    impulse[0] = 1
+    full = gammatone.filters.erb_filterbank(impulse, coefs)
+
+    kept = responses.shape[1]
+    assert np.array_equal(responses[:, :1], full[:, :1])
+
+    discarded = (full[:, kept:] ** 2).sum(axis=1)
+    total = (full ** 2).sum(axis=1)
+    assert np.all(discarded <= tolerance * total)
+
+
+def test_fir_matches_iir():
+    for tolerance, bound in ((1e-6, 1e-2), (1e-10, 1e-4), (1e-14, 1e-6)):
+        yield FIREngineTester(tolerance, bound)
+
+
+class FIREngineTester:
+
+    def __init__(self, tolerance, bound):
+        self.tolerance = tolerance
+        self.bound = bound
+        self.description = (
+            "FIR engine with energy tolerance {:g}".format(tolerance)
+        )
+
+    def __call__(self):
+        coefs = make_coefs()
+        signal = np.random.RandomState(7).randn(2, 3 * FS)
+
+        expected = gammatone.filters.erb_filterbank(signal, coefs)
+        result = gammatone.filters.erb_filterbank(
+            signal, coefs, engine='fir', fir_tolerance=self.tolerance
+        )
+
+        assert result.shape == expected.shape
+        assert max_relative_error(result, expected) < self.bound
+
+
+def test_fir_gtgram():
+    signal = np.random.RandomState(8).randn(FS)
+    args = (FS, 0.025, 0.01, CHANNELS, F_MIN)
+
+    expected = gammatone.gtgram.gtgram(signal, *args)
+    result = gammatone.gtgram.gtgram(signal, *args, engine='fir')
+
+    assert np.allclose(result, expected, rtol=1e-3)
+
+
+def test_unknown_engine():
+    with nose.tools.assert_raises(ValueError):
+        gammatone.filters.erb_filterbank(np.zeros(10), make_coefs(), engine='x')
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.filters
+
+IMPULSE_LENGTH = 2 ** 15
+
+# (fs, channels, f_min, width)
+DESIGNS = (
+    (16000, 10, 100, 1.0),
+    (44100, 64, 50, 1.0),
+    (8000, 32, 200, 0.5),
+    (22050, 16, 100, 2.0),
+)
+
+
+def test_frequency_response():
+    for fs, channels, f_min, width in DESIGNS:
+        yield FrequencyResponseTester(fs, channels, f_min, width)
+
+
+class FrequencyResponseTester:
+
+    def __init__(self, fs, channels, f_min, width):
+        self.fs = fs
+        self.channels = channels
+        self.f_min = f_min
+        self.width = width
+        self.description = (
+            "Frequency response for fs = {:d}, {:d} channels, "
+            "f_min = {:d}, width = {:g}"
+            .format(fs, channels, f_min, width)
+        )
+
+    def __call__(self):
+        cfs = gammatone.filters.centre_freqs(
+            self.fs, self.channels, self.f_min
+        )
+        coefs = gammatone.filters.make_erb_filters(self.fs, cfs, self.width)
+
+        impulse = np.zeros(IMPULSE_LENGTH)
+        impulse[0] = 1
+        expected = np.fft.rfft(
+            gammatone.filters.erb_filterbank(impulse, coefs, backend='scipy'),
+            axis=-1
+        )
+        freqs = np.fft.rfftfreq(IMPULSE_LENGTH, 1 / self.fs)
+
+        result = gammatone.filters.erb_frequency_response(
+            coefs, self.fs, freqs
+        )
+
+        assert result.shape == expected.shape
+        assert np.allclose(result, expected, rtol=0, atol=1e-9)
+
+
+def test_frequency_response_grid():
+    fs = 16000
+    cfs = gammatone.filters.centre_freqs(fs, 8, 100)
+    coefs = gammatone.filters.make_erb_filters(fs, cfs)
+    freqs = np.geomspace(100, 8000, 60).reshape(3, 20)
+
+    result = gammatone.filters.erb_frequency_response(coefs, fs, freqs)
+
+    assert result.shape == (8, 3, 20)
+    for idx in range(3):
+        assert np.array_equal(
+            result[:, idx],
+            gammatone.filters.erb_frequency_response(coefs, fs, freqs[idx])
+        )
+
+    # Every channel has unity gain at its centre frequency
+    at_centre = gammatone.filters.erb_frequency_response(coefs, fs, cfs)
+    assert np.allclose(np.abs(np.diagonal(at_centre)), 1, rtol=1e-3)
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.gtgram
+
+FS = 16000
+
+# (window_time, hop_time, channels, f_min)
+PARAMS = (
+    (0.025, 0.01, 16, 50),
+    (0.02, 0.03, 8, 100),
+    (0.0253, 0.0111, 8, 80),
+)
+
+BLOCK_SIZES = (1, 97, 1000, 4096, 10 ** 6)
+
+
+def test_block_gtgram():
+    for params in PARAMS:
+        for block_size in BLOCK_SIZES:
+            yield BlockGtgramTester(params, block_size)
+
+
+class BlockGtgramTester:
+
+    def __init__(self, params, block_size):
+        self.params = params
+        self.block_size = block_size
+        self.description = (
+            "Block gtgram for {}, block size {:d}".format(params, block_size)
+        )
+
+    def __call__(self):
+        signal = np.random.RandomState(9).randn(2, FS)
+
+        expected = gammatone.gtgram.gtgram(signal, FS, *self.params)
+        result = gammatone.gtgram.gtgram(
+            signal, FS, *self.params, block_size=self.block_size
+        )
+
+        assert np.array_equal(result, expected)
+
+
+def test_block_gtgram_needs_iir():
+    with nose.tools.assert_raises(ValueError):
+        gammatone.gtgram.gtgram(
+            np.zeros(FS), FS, *PARAMS[0], engine='fir', block_size=100
+        )
+
+
+if __name__ == '__main__':
+    nose.main()
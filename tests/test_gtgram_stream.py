@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.gtgram
+
+FS = 16000
+
+# (window_time, hop_time, channels, f_min)
+PARAMS = (
+    (0.025, 0.01, 16, 50),
+    (0.02, 0.03, 8, 100),
+    (0.0253, 0.0111, 8, 80),
+)
+
+# Upper limits for random chunk sizes
+MAX_CHUNKS = (1, 50, 700, 20000)
+
+# Filterbank backends to stream with, where None is the default (numba if it is
+# installed), so that the scipy backend is covered either way
+STREAM_BACKENDS = (None, 'scipy')
+
+
+def random_chunks(signal, max_chunk, seed):
+    """ Splits the last axis of ``signal`` into chunks of random sizes """
+    rng = np.random.RandomState(seed)
+    start = 0
+    while start < signal.shape[-1]:
+        size = rng.randint(0, max_chunk + 1)
+        yield signal[..., start:start + size]
+        start += size
+
+
+def test_gtgram_stream():
+    for params in PARAMS:
+        for max_chunk in MAX_CHUNKS:
+            for backend in STREAM_BACKENDS:
+                yield GtgramStreamTester(params, max_chunk, backend)
+
+
+class GtgramStreamTester:
+
+    def __init__(self, params, max_chunk, backend):
+        self.params = params
+        self.max_chunk = max_chunk
+        self.backend = backend
+        self.description = (
+            "Streaming gtgram for {}, chunks of up to {:d} samples, "
+            "backend = {}".format(params, max_chunk, backend)
+        )
+
+    def __call__(self):
+        signal = np.random.RandomState(10).randn(2, FS // 2)
+        expected = gammatone.gtgram.gtgram(signal, FS, *self.params)
+
+        stream = gammatone.gtgram.GammatonegramStream(
+            FS, *self.params, batch_shape=(2,), backend=self.backend
+        )
+        result = np.concatenate(
+            [
+                stream.process(chunk)
+                for chunk in random_chunks(signal, self.max_chunk, 11)
+            ],
+            axis=-1
+        )
+
+        assert stream.columns == expected.shape[-1]
+        assert np.array_equal(result, expected)
+
+
+def test_gtgram_frames():
+    params = PARAMS[2]
+    signal = np.random.RandomState(12).randn(FS // 2)
+    expected = gammatone.gtgram.gtgram(signal, FS, *params)
+
+    frames = list(gammatone.gtgram.gtgram_frames(
+        random_chunks(signal, 300, 13), FS, *params
+    ))
+
+    assert len(frames) == expected.shape[-1]
+    assert np.array_equal(np.stack(frames, axis=-1), expected)
+
+
+def test_gtgram_stream_latency():
+    window_time, hop_time, channels, f_min = PARAMS[0]
+    nwin, hop_samples, _ = gammatone.gtgram.gtgram_strides(
+        FS, window_time, hop_time, 0
+    )
+    signal = np.random.RandomState(14).randn(FS // 4)
+    stream = gammatone.gtgram.GammatonegramStream(FS, *PARAMS[0])
+
+    # Every column is returned by the chunk containing its last sample
+    fed = 0
+    for cnum in range(5):
+        end = cnum * hop_samples + nwin
+        assert stream.process(signal[fed:end - 1]).shape[-1] == 0
+        assert stream.process(signal[end - 1:end]).shape == (channels, 1)
+        fed = end
+
+
+def test_gtgram_stream_reset():
+    signal = np.random.RandomState(15).randn(FS // 4)
+    stream = gammatone.gtgram.GammatonegramStream(FS, *PARAMS[0])
+
+    first = stream.process(signal)
+    stream.reset()
+
+    assert stream.columns == 0
+    assert np.array_equal(stream.process(signal), first)
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.gtgram
+
+# (nwin, hop_samples, signal length)
+STRIDES = (
+    (100, 50, 1000),
+    (100, 33, 1000),
+    (100, 100, 1050),
+    (64, 150, 1000),
+    (7, 1, 50),
+    (100, 40, 100),
+)
+
+
+def test_integrate_windows():
+    for nwin, hop_samples, length in STRIDES:
+        yield IntegrateWindowsTester(nwin, hop_samples, length)
+
+
+class IntegrateWindowsTester:
+
+    def __init__(self, nwin, hop_samples, length):
+        self.nwin = nwin
+        self.hop_samples = hop_samples
+        self.length = length
+        self.description = (
+            "Window integration for nwin = {:d}, hop = {:d}, length = {:d}"
+            .format(nwin, hop_samples, length)
+        )
+
+    def __call__(self):
+        xe = np.random.RandomState(10).randn(2, 3, self.length) ** 2
+        ncols = 1 + (self.length - self.nwin) // self.hop_samples
+
+        expected = np.empty(xe.shape[:-1] + (ncols,))
+        for cnum in range(ncols):
+            start = cnum * self.hop_samples
+            segment = xe[..., start:start + self.nwin]
+            expected[..., cnum] = np.sqrt(segment.mean(-1))
+
+        out = np.empty_like(expected)
+        result = gammatone.gtgram.integrate_windows(
+            xe, self.nwin, self.hop_samples, out
+        )
+
+        assert result is out
+        assert np.allclose(out, expected, rtol=1e-12, atol=0)
+
+
+if __name__ == '__main__':
+    nose.main()
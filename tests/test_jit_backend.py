@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.filters
+
+FS = 16000
+CHANNELS = 20
+F_MIN = 50
+
+# (signal shape, dtype, workers)
+CASES = (
+    ((3000,), np.float64, None),
+    ((2, 3, 1001), np.float64, None),
+    ((2, 1000), np.float32, None),
+    ((3000,), np.float64, 3),
+)
+
+
+def make_coefs():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    return gammatone.filters.make_erb_filters(FS, cfs)
+
+
+def skip_without_numba():
+    if gammatone.filters.jit is None:
+        raise nose.SkipTest("numba is not installed")
+
+
+def test_jit_backend():
+    for shape, dtype, workers in CASES:
+        yield JitBackendTester(shape, dtype, workers)
+
+
+class JitBackendTester:
+
+    def __init__(self, shape, dtype, workers):
+        self.shape = shape
+        self.dtype = dtype
+        self.workers = workers
+        self.description = (
+            "Numba backend for shape = {}, dtype = {}, workers = {}"
+            .format(shape, np.dtype(dtype).name, workers)
+        )
+
+    def __call__(self):
+        skip_without_numba()
+        coefs = make_coefs()
+        signal = np.random.RandomState(6).randn(*self.shape)
+
+        expected = gammatone.filters.erb_filterbank(
+            signal, coefs, dtype=self.dtype, backend='scipy'
+        )
+        result = gammatone.filters.erb_filterbank(
+            signal, coefs, dtype=self.dtype, workers=self.workers,
+            backend='numba'
+        )
+
+        assert result.dtype == self.dtype
+        assert np.array_equal(result, expected)
+
+
+def test_jit_streaming():
+    skip_without_numba()
+    coefs = make_coefs()
+    signal = np.random.RandomState(7).randn(2, 3000)
+
+    scipy_fbank = gammatone.filters.GammatoneFilterbank(
+        coefs, batch_shape=(2,), backend='scipy'
+    )
+    numba_fbank = gammatone.filters.GammatoneFilterbank(
+        coefs, batch_shape=(2,), backend='numba'
+    )
+
+    for start in range(0, signal.shape[-1], 700):
+        block = signal[..., start:start + 700]
+        assert np.array_equal(
+            numba_fbank.process(block), scipy_fbank.process(block)
+        )
+
+    assert np.array_equal(numba_fbank.get_state(), scipy_fbank.get_state())
+
+
+def test_bad_backend():
+    with nose.tools.assert_raises(ValueError):
+        gammatone.filters.erb_filterbank(
+            np.zeros(10), make_coefs(), backend='cython'
+        )
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+import scipy.signal
+
+import gammatone.gtgram
+
+FS = 16000
+
+# (window_time, hop_time, channels, f_min)
+PARAMS = (
+    (0.025, 0.01, 16, 50),
+    (0.0253, 0.0111, 8, 80),
+)
+
+STAGES = (1, 2, 4)
+
+# Upper limits for random chunk sizes
+MAX_CHUNKS = (1, 300, 20000)
+
+
+def random_chunks(signal, max_chunk, seed):
+    """ Splits the last axis of ``signal`` into chunks of random sizes """
+    rng = np.random.RandomState(seed)
+    start = 0
+    while start < signal.shape[-1]:
+        size = rng.randint(0, max_chunk + 1)
+        yield signal[..., start:start + size]
+        start += size
+
+
+def test_leaky_stream():
+    for params in PARAMS:
+        for stages in STAGES:
+            for max_chunk in MAX_CHUNKS:
+                yield LeakyStreamTester(params, stages, max_chunk)
+
+
+class LeakyStreamTester:
+
+    def __init__(self, params, stages, max_chunk):
+        self.params = params
+        self.stages = stages
+        self.max_chunk = max_chunk
+        self.description = (
+            "Streaming leaky gtgram for {}, {:d} stages, chunks of up to {:d} "
+            "samples".format(params, stages, max_chunk)
+        )
+
+    def __call__(self):
+        signal = np.random.RandomState(20).randn(2, FS // 4)
+        expected = gammatone.gtgram.gtgram(
+            signal, FS, *self.params,
+            integration='leaky',
+            integration_stages=self.stages
+        )
+
+        stream = gammatone.gtgram.GammatonegramStream(
+            FS, *self.params,
+            batch_shape=(2,),
+            integration='leaky',
+            integration_stages=self.stages
+        )
+        result = np.concatenate(
+            [
+                stream.process(chunk)
+                for chunk in random_chunks(signal, self.max_chunk, 21)
+            ],
+            axis=-1
+        )
+
+        assert stream.columns == expected.shape[-1]
+        assert np.array_equal(result, expected)
+
+
+def test_leaky_frames():
+    params = PARAMS[1]
+    signal = np.random.RandomState(25).randn(FS // 4)
+    expected = gammatone.gtgram.gtgram(
+        signal, FS, *params, integration='leaky', integration_stages=2
+    )
+
+    frames = list(gammatone.gtgram.gtgram_frames(
+        random_chunks(signal, 300, 26), FS, *params,
+        integration='leaky',
+        integration_stages=2,
+        backend='scipy'
+    ))
+
+    assert len(frames) == expected.shape[-1]
+    assert np.array_equal(np.stack(frames, axis=-1), expected)
+
+
+def test_leaky_blocks():
+    signal = np.random.RandomState(22).randn(FS // 4)
+    expected = gammatone.gtgram.gtgram(
+        signal, FS, *PARAMS[0], integration='leaky'
+    )
+    result = gammatone.gtgram.gtgram(
+        signal, FS, *PARAMS[0], integration='leaky', block_size=777
+    )
+    assert np.array_equal(result, expected)
+
+
+def test_leaky_shape():
+    signal = np.random.RandomState(23).randn(FS // 4)
+    for params in PARAMS:
+        window = gammatone.gtgram.gtgram(signal, FS, *params)
+        leaky = gammatone.gtgram.gtgram(
+            signal, FS, *params, integration='leaky'
+        )
+        assert leaky.shape == window.shape
+
+
+def test_leaky_short_signals():
+    # Signals shorter than one window, including empty ones, have no columns
+    for length in (0, 100):
+        signal = np.random.RandomState(24).randn(length)
+        for params in PARAMS:
+            leaky = gammatone.gtgram.gtgram(
+                signal, FS, *params, integration='leaky'
+            )
+            assert leaky.shape == (params[2], 0)
+
+
+def test_leaky_steady_level():
+    # A steady tone has the same RMS level whichever window is used
+    t = np.arange(FS // 2) / FS
+    tone = np.sin(2 * np.pi * 1000 * t)
+    window = gammatone.gtgram.gtgram(tone, FS, *PARAMS[0])
+    for stages in STAGES:
+        leaky = gammatone.gtgram.gtgram(
+            tone, FS, *PARAMS[0],
+            integration='leaky',
+            integration_stages=stages
+        )
+        assert np.allclose(leaky[:, -1], window[:, -1], rtol=0.02, atol=1e-3)
+
+
+def test_time_constant():
+    # The impulse response of the cascade should have the same equivalent
+    # rectangular duration as the window
+    window_time = 0.02
+    impulse = np.zeros(FS)
+    impulse[0] = 1
+    for stages in STAGES:
+        sos = gammatone.gtgram.leaky_integrator_sos(FS, window_time, stages)
+        response = scipy.signal.sosfilt(sos, impulse)
+        duration = response.sum() ** 2 / (response ** 2).sum() / FS
+        assert np.isclose(duration, window_time, rtol=0.01)
+
+
+def test_leaky_errors():
+    signal = np.zeros(FS // 10)
+    with nose.tools.assert_raises(ValueError):
+        gammatone.gtgram.gtgram(signal, FS, *PARAMS[0], integration='box')
+    with nose.tools.assert_raises(ValueError):
+        gammatone.gtgram.gtgram(
+            signal, FS, *PARAMS[0], integration='leaky', multirate=True
+        )
+    with nose.tools.assert_raises(ValueError):
+        gammatone.gtgram.leaky_integrator_sos(FS, 0.025, 0)
+
+
+if __name__ == '__main__':
+    nose.main()
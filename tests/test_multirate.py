@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.filters
+import gammatone.gtgram
+
+FS = 48000
+CHANNELS = 64
+F_MIN = 20
+ARGS = (FS, 0.025, 0.01, CHANNELS, F_MIN)
+
+
+def test_bands_cover_channels():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)[::-1]
+    bands = gammatone.filters.multirate_bands(FS, cfs, max_decimation=16)
+
+    assert bands[0].lo == 0
+    assert bands[-1].hi == CHANNELS
+    assert bands[-1].decimation == 1
+
+    for band, following in zip(bands[:-1], bands[1:]):
+        assert band.hi == following.lo
+        assert band.decimation == 2 * following.decimation
+
+    for band in bands:
+        assert band.fs == FS / band.decimation
+        assert band.coefs.shape == (band.hi - band.lo, 10)
+
+    for band in bands[:-1]:
+        upper = cfs[band.lo:band.hi].max()
+        assert upper < gammatone.filters.MULTIRATE_MAX_FRACTION * band.fs
+
+
+def test_multirate_noise():
+    signal = np.random.RandomState(11).randn(FS)
+
+    expected = gammatone.gtgram.gtgram(signal, *ARGS)
+    result = gammatone.gtgram.gtgram(signal, *ARGS, multirate=True)
+
+    assert result.shape == expected.shape
+
+    # Leave out the edges, where the anti-alias filters see the signal ends
+    error = 20 * np.log10(result / expected)[:, 5:-5]
+    assert np.all(np.abs(error.mean(axis=1)) < 0.25)
+    assert np.percentile(np.abs(error), 99) < 1
+
+
+def test_multirate_tones():
+    time = np.arange(FS) / FS
+    signal = sum(
+        np.sin(2 * np.pi * freq * time) for freq in (60, 250, 1000, 5000)
+    )
+
+    expected = gammatone.gtgram.gtgram(signal, *ARGS)
+    result = gammatone.gtgram.gtgram(signal, *ARGS, multirate=True)
+
+    error = 20 * np.log10(result / expected)[:, 5:-5]
+    assert np.abs(error).max() < 0.75
+
+
+def test_multirate_batch():
+    signals = np.random.RandomState(12).randn(2, FS // 4)
+
+    result = gammatone.gtgram.gtgram(signals, *ARGS, multirate=True)
+    expected = np.stack([
+        gammatone.gtgram.gtgram(sig, *ARGS, multirate=True) for sig in signals
+    ])
+
+    assert np.allclose(result, expected, rtol=1e-12)
+
+
+def test_multirate_short_signal():
+    # Signals shorter than one window have no columns, as in the other modes,
+    # including those shorter than the overlap between windows
+    for length in (1000, 100):
+        signal = np.random.RandomState(13).randn(length)
+
+        for kwargs in ({}, {'block_size': 64}, {'multirate': True}):
+            result = gammatone.gtgram.gtgram(signal, *ARGS, **kwargs)
+            assert result.shape == (CHANNELS, 0)
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.cache
+import gammatone.fftweight
+import gammatone.filters
+import gammatone.gtgram
+
+FS = 16000
+CHANNELS = 12
+F_MIN = 100
+GTGRAM_ARGS = (FS, 0.025, 0.01, CHANNELS, F_MIN)
+
+
+def make_coefs():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    return gammatone.filters.make_erb_filters(FS, cfs)
+
+
+def calls():
+    """
+    Yields ``(description, function)`` pairs, where ``function`` takes ``out``
+    and ``workspace`` arguments
+    """
+    signal = np.random.RandomState(16).randn(4000)
+    coefs = make_coefs()
+
+    for engine in gammatone.filters.ENGINES:
+        yield (
+            "erb_filterbank, {} engine".format(engine),
+            lambda engine=engine, **kwargs: gammatone.filters.erb_filterbank(
+                signal, coefs, engine=engine, **kwargs
+            )
+        )
+
+    yield (
+        "erb_filterbank, energy output",
+        lambda **kwargs: gammatone.filters.erb_filterbank(
+            signal, coefs, output='energy', decimation=8, **kwargs
+        )
+    )
+
+    yield (
+        "gtgram_xe",
+        lambda **kwargs: gammatone.gtgram.gtgram_xe(
+            signal, FS, CHANNELS, F_MIN, **kwargs
+        )
+    )
+
+    for mode in (dict(), dict(block_size=500), dict(multirate=True)):
+        yield (
+            "gtgram {}".format(mode),
+            lambda mode=mode, **kwargs: gammatone.gtgram.gtgram(
+                signal, *GTGRAM_ARGS, **dict(mode, **kwargs)
+            )
+        )
+
+    yield (
+        "specgram",
+        lambda **kwargs: gammatone.fftweight.specgram(
+            signal, 512, FS, 400, 160, **kwargs
+        )
+    )
+
+    yield (
+        "fft_gtgram",
+        lambda **kwargs: gammatone.fftweight.fft_gtgram(
+            signal, *GTGRAM_ARGS, **kwargs
+        )
+    )
+
+
+def test_out_workspace():
+    for description, function in calls():
+        yield OutWorkspaceTester(description, function)
+
+
+class OutWorkspaceTester:
+
+    def __init__(self, description, function):
+        self.function = function
+        self.description = "out and workspace for {}".format(description)
+
+    def __call__(self):
+        expected = self.function()
+
+        # Fill with garbage, so that anything left unwritten is caught
+        out = np.full_like(expected, np.nan)
+        workspace = {}
+
+        scratch = []
+        for _ in range(2):
+            result = self.function(out=out, workspace=workspace)
+            assert result is out
+            assert np.array_equal(result, expected)
+            scratch.append({key: id(arr) for key, arr in workspace.items()})
+
+        # The second call reuses the scratch arrays of the first
+        assert scratch[0] == scratch[1]
+
+        with nose.tools.assert_raises(ValueError):
+            self.function(out=np.empty(expected.shape[:-1] + (1,)))
+
+
+def test_workspace_array():
+    workspace = {}
+    first = gammatone.cache.workspace_array(workspace, 'a', (3, 4), np.float32)
+    again = gammatone.cache.workspace_array(workspace, 'a', (3, 4), np.float32)
+    other = gammatone.cache.workspace_array(workspace, 'a', (3, 5), np.float32)
+
+    assert again is first
+    assert other is not first and other.shape == (3, 5)
+    assert workspace['a'] is other
+    assert gammatone.cache.workspace_array(None, 'a', (2,), float).shape == (2,)
+
+
+if __name__ == '__main__':
+    nose.main()
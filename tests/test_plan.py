@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import pickle
+
+import nose
+import numpy as np
+
+import gammatone.fftweight
+import gammatone.gtgram
+import gammatone.plan
+
+FS = 16000
+
+# (window_time, hop_time, channels, f_min)
+PARAMS = (
+    (0.025, 0.01, 16, 50),
+    (0.0253, 0.0111, 8, 80),
+)
+
+FUNCTIONS = {
+    'gtgram': gammatone.gtgram.gtgram,
+    'fft_gtgram': gammatone.fftweight.fft_gtgram,
+}
+
+
+def test_plan():
+    for method in gammatone.plan.METHODS:
+        for params in PARAMS:
+            for dtype in (np.float64, np.float32):
+                yield PlanTester(method, params, dtype)
+
+
+class PlanTester:
+
+    def __init__(self, method, params, dtype):
+        self.method = method
+        self.params = params
+        self.dtype = dtype
+        self.description = "{} plan for {}, dtype = {}".format(
+            method, params, np.dtype(dtype).name
+        )
+
+    def __call__(self):
+        plan = gammatone.plan.GammatonegramPlan(
+            FS, *self.params, method=self.method, dtype=self.dtype
+        )
+        unpickled = pickle.loads(pickle.dumps(plan))
+
+        # Including a clip shorter than the overlap between windows
+        for length in (100, FS // 10, FS // 3):
+            signal = np.random.RandomState(length).randn(length)
+            expected = FUNCTIONS[self.method](
+                signal, FS, *self.params, dtype=self.dtype
+            )
+
+            assert plan.columns(length) == expected.shape[-1]
+            assert np.array_equal(plan(signal), expected)
+            assert np.array_equal(unpickled(signal), expected)
+
+
+def test_plan_batch():
+    plan = gammatone.plan.GammatonegramPlan(FS, *PARAMS[0])
+    signal = np.random.RandomState(17).randn(2, 3, FS // 5)
+
+    assert np.array_equal(
+        plan(signal), gammatone.gtgram.gtgram(signal, FS, *PARAMS[0])
+    )
+
+
+def test_plan_pickle_size():
+    plan = gammatone.plan.GammatonegramPlan(
+        44100, 0.025, 0.01, 256, 20, method='fft_gtgram'
+    )
+    # Only the parameters are pickled, not the weights
+    assert plan.weights.nbytes > 10 ** 6
+    assert len(pickle.dumps(plan)) < 1000
+
+
+def test_bad_method():
+    with nose.tools.assert_raises(ValueError):
+        gammatone.plan.GammatonegramPlan(FS, *PARAMS[0], method='fft')
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.filters
+
+FS = 16000
+CHANNELS = 6
+F_MIN = 30
+
+
+def make_coefs():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    return gammatone.filters.make_erb_filters(FS, cfs)
+
+
+def test_decay_length():
+    coefs = make_coefs()
+    loose = gammatone.filters.erb_decay_length(coefs, 1e-3)
+    tight = gammatone.filters.erb_decay_length(coefs, 1e-9)
+
+    assert loose.shape == (CHANNELS,)
+    assert np.all(tight > loose)
+    # Lower frequency channels have narrower bandwidths, and ring for longer
+    assert np.all(np.diff(loose) > 0)
+
+
+def test_segmented_filterbank():
+    for segments in (1, 3, 8):
+        for tolerance in (1e-4, 1e-8):
+            yield SegmentedTester(segments, tolerance)
+
+
+class SegmentedTester:
+
+    def __init__(self, segments, tolerance):
+        self.segments = segments
+        self.tolerance = tolerance
+        self.description = (
+            "Segmented filterbank, {:d} segments, tolerance {:g}".format(
+                segments, tolerance
+        ))
+
+    def __call__(self):
+        coefs = make_coefs()
+        signal = np.random.RandomState(6).randn(2, FS)
+        expected = gammatone.filters.erb_filterbank(signal, coefs)
+
+        result = gammatone.filters.erb_filterbank_segmented(
+            signal, coefs,
+            segments=self.segments,
+            tolerance=self.tolerance,
+            workers=2
+        )
+
+        assert result.shape == expected.shape
+        error = np.abs(result - expected).max(axis=-1)
+        peak = np.abs(expected).max(axis=-1)
+        assert np.all(error <= self.tolerance * peak)
+
+
+if __name__ == '__main__':
+    nose.main()
@@ -76,5 +76,131 @@ class SpecgramTester:
 
             assert np.allclose(result, self.expected, rtol=1e-6, atol=1e-12), diagnostic
 
+
+def test_specgram_single_precision():
+    for inputs, mocks, refs in load_reference_data():
+        args = (
+            inputs['nfft'],
+            inputs['fs'],
+            inputs['nwin'],
+            inputs['nhop'],
+        )
+
+        yield SpecgramSinglePrecisionTester(
+            inputs['name'][0],
+            args,
+            inputs['wave'],
+            mocks['window'],
+            refs['res']
+        )
+
+class SpecgramSinglePrecisionTester(SpecgramTester):
+    """ Single precision specgram against the double precision reference """
+
+    def __init__(self, name, args, sig, window, expected):
+        super().__init__(name, args, sig, window, expected)
+        self.description = "Single precision specgram for {:s}".format(name)
+
+    def __call__(self):
+        with patch(
+                'gammatone.fftweight.specgram_window',
+                return_value=self.window):
+            result = gammatone.fftweight.specgram(
+                self.signal, *self.args, dtype=np.float32
+            )
+
+            assert result.dtype == np.complex64
+            max_diff = np.max(np.abs(result - self.expected))
+            peak = np.max(np.abs(self.expected))
+            diagnostic = "Maximum relative difference: {:6e}".format(
+                max_diff / peak
+            )
+            assert max_diff <= 1e-6 * peak, diagnostic
+
+def reference_specgram(signal, window, nhop):
+    """ One full FFT per frame, as in the original MATLAB code """
+    nfft = window.shape[0]
+    starts = range(0, signal.shape[0] - nfft + 1, nhop)
+    return np.stack(
+        [
+            np.fft.fft(window * signal[b:b + nfft])[:1 + nfft // 2]
+            for b in starts
+        ],
+        axis=-1
+    )
+
+
+def test_specgram_last_frame():
+    # When the hop divides the signal length minus the FFT length, the last
+    # frame ends exactly at the end of the signal, and must still be included
+    nfft, nwin, nhop = 256, 200, 64
+    signal = np.random.RandomState(40).randn(nfft + 5 * nhop)
+    window = gammatone.fftweight.specgram_window(nfft, nwin)
+
+    result = gammatone.fftweight.specgram(signal, nfft, 8000, nwin, nhop)
+    expected = reference_specgram(signal, window, nhop)
+
+    assert result.shape == (1 + nfft // 2, 6)
+    assert np.abs(result[:, -1]).max() > 0
+    assert np.allclose(result, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_specgram_blocks():
+    # Blocks of frames give the same result however the frames are split
+    nfft, nwin, nhop = 128, 100, 30
+    signal = np.random.RandomState(41).randn(5000)
+    expected = gammatone.fftweight.specgram(signal, nfft, 8000, nwin, nhop)
+
+    for block_frames in (1, 7, 1000):
+        with patch(
+                'gammatone.fftweight.SPECGRAM_BLOCK_SAMPLES',
+                block_frames * nfft):
+            result = gammatone.fftweight.specgram(
+                signal, nfft, 8000, nwin, nhop
+            )
+        assert np.array_equal(result, expected)
+
+
+def test_specgram_short_signal():
+    # Signals shorter than one frame have no columns
+    nfft, nwin, nhop = 1024, 800, 160
+
+    for length in (900, 1000):
+        signal = np.random.RandomState(43).randn(length)
+        result = gammatone.fftweight.specgram(signal, nfft, 16000, nwin, nhop)
+        assert result.shape == (1 + nfft // 2, 0)
+
+
+def test_specgram_batch():
+    # Batches of signals aren't supported, and mustn't be framed along the
+    # wrong axis
+    signals = np.random.RandomState(44).randn(3, 4000)
+    with nose.tools.assert_raises(ValueError):
+        gammatone.fftweight.specgram(signals, 256, 8000, 200, 50)
+
+
+def test_specgram_magnitude():
+    nfft, nwin, nhop = 256, 200, 50
+    signal = np.random.RandomState(42).randn(4000)
+
+    for dtype in (np.float64, np.float32):
+        expected = np.abs(gammatone.fftweight.specgram(
+            signal, nfft, 8000, nwin, nhop, dtype=dtype
+        ))
+        out = np.empty_like(expected)
+        result = gammatone.fftweight.specgram(
+            signal, nfft, 8000, nwin, nhop,
+            dtype=dtype,
+            out=out,
+            magnitude=True
+        )
+
+        assert result is out
+        assert result.dtype == dtype
+        # Before numpy 2, single precision is transformed in double precision,
+        # so the magnitudes are rounded differently from np.abs of the result
+        assert np.allclose(result, expected, rtol=1e-6)
+
+
 if __name__ == '__main__':
     nose.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# Copyright 2014 Jason Heeris, jason.heeris@gmail.com
+#
+# This file is part of the gammatone toolkit, and is licensed under the 3-clause
+# BSD license: https://github.com/detly/gammatone/blob/master/COPYING
+import nose
+import numpy as np
+
+import gammatone.filters
+import gammatone.gtgram
+
+FS = 16000
+CHANNELS = 20
+F_MIN = 50
+
+
+def make_coefs():
+    cfs = gammatone.filters.centre_freqs(FS, CHANNELS, F_MIN)
+    return gammatone.filters.make_erb_filters(FS, cfs)
+
+
+def test_threaded_filterbank():
+    coefs = make_coefs()
+    signal = np.random.RandomState(3).randn(2, 3000)
+    expected = gammatone.filters.erb_filterbank(signal, coefs)
+
+    for workers in (2, 3, 7, CHANNELS + 5, -1):
+        yield ThreadedFilterbankTester(signal, coefs, workers, expected)
+
+
+class ThreadedFilterbankTester:
+
+    def __init__(self, signal, coefs, workers, expected):
+        self.signal = signal
+        self.coefs = coefs
+        self.workers = workers
+        self.expected = expected
+        self.description = "Filterbank with {:d} workers".format(workers)
+
+    def __call__(self):
+        result = gammatone.filters.erb_filterbank(
+            self.signal, self.coefs, workers=self.workers
+        )
+        assert np.array_equal(result, self.expected)
+
+
+def test_threaded_streaming():
+    coefs = make_coefs()
+    signal = np.random.RandomState(4).randn(3000)
+
+    serial = gammatone.filters.GammatoneFilterbank(coefs)
+    threaded = gammatone.filters.GammatoneFilterbank(coefs, workers=4)
+
+    for start in range(0, signal.shape[0], 700):
+        block = signal[start:start + 700]
+        assert np.array_equal(threaded.process(block), serial.process(block))
+
+    assert np.array_equal(threaded.get_state(), serial.get_state())
+
+
+def test_threaded_gtgram():
+    signal = np.random.RandomState(5).randn(4000)
+    args = (FS, 0.025, 0.01, CHANNELS, F_MIN)
+
+    assert np.array_equal(
+        gammatone.gtgram.gtgram(signal, *args, workers=3),
+        gammatone.gtgram.gtgram(signal, *args)
+    )
+
+
+def test_bad_workers():
+    with nose.tools.assert_raises(ValueError):
+        gammatone.filters.erb_filterbank(np.zeros(10), make_coefs(), workers=0)
+
+
+if __name__ == '__main__':
+    nose.main()